@@ -1,5 +1,5 @@
+import asyncio
 import os
-import re
 from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import AgentSession, Agent, RoomInputOptions, RoomOutputOptions
@@ -10,18 +10,22 @@ from api import (
     check_room_availability,
     get_room_pricing,
     book_room,
+    book_rooms,
     get_room_details,
     suggest_room_for_occasion,
     calculate_discount,
-    get_booking_summary
+    get_booking_summary,
+    quote_stay_options
 )
-from dbdriver import MeetingDatabase
+from dbdriver import AsyncMeetingDatabase, MeetingBusyError, MeetingDatabase, prewarm_embedding_model
+from metrics import REGISTRY, start_from_env
+from intents import route
 
-load_dotenv(env_path="CoreLance/.env")
+load_dotenv(dotenv_path="CoreLance/.env")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 class HotelReceptionistAgent(Agent):
-    def __init__(self) -> None:
+    def __init__(self, meeting: AsyncMeetingDatabase = None) -> None:
         super().__init__(
             instructions=WELCOME_PROMPT + "\n\n" + ROOM_TYPES_INFO,
             tools=[
@@ -29,54 +33,79 @@ class HotelReceptionistAgent(Agent):
                 check_room_availability,
                 get_room_pricing,
                 book_room,
+                book_rooms,
                 get_room_details,
                 suggest_room_for_occasion,
                 calculate_discount,
-                get_booking_summary
+                get_booking_summary,
+                quote_stay_options
             ]
         )
-        self.meeting_db = MeetingDatabase()
+        # Model inference, PDF parsing and SQLite run on the facade's worker
+        # pools, never on the event loop that carries the voice session
+        self.meeting = meeting or AsyncMeetingDatabase(MeetingDatabase())
+        self.meeting_db = self.meeting.db
+
+    async def reply_to_transcript(self, session, event):
+        """Answer a final user_input_transcribed event through the meeting-file handler"""
+        if event.is_final:
+            rag_response = await self.handle_user_message(event.transcript)
+            await session.send_message(rag_response)
 
     # RAG-aware conversational handler
     async def handle_user_message(self, message: str) -> str:
-        text = message.lower().strip()
+        try:
+            return await self._route_message(message)
+        except MeetingBusyError:
+            return "I'm still working on other meeting requests. Please try again in a moment."
+        except asyncio.TimeoutError:
+            return "That is taking longer than expected. Please try again shortly."
+
+    async def _route_message(self, message: str) -> str:
+        # One scan classifies the transcript and pulls out its arguments
+        intent = route(message.strip())
+        name, args = intent if intent else (None, {})
+
+        # Check on or cancel a background ingestion job
+        if name == 'cancel_job':
+            job_id = args['job_id']
+            if self.meeting.cancel_job(job_id):
+                return f"Cancelled job {job_id}."
+            job = self.meeting.job_status(job_id)
+            if job and job['state'] == 'running':
+                return f"Job {job_id} has already started and can't be cancelled; it will finish shortly."
+            return f"Job {job_id} is not queued or running."
+        if name == 'job_status':
+            return self.describe_job(args['job_id'])
 
         # Add PDF as meeting file
-        if re.search(r'\b(add|ingest)\b.*\b(pdf)\b', text):
-            match = re.search(r"(?:path|file(?:name)?|file):\s*([^\s]+\.pdf)", message, re.IGNORECASE)
-            pdf_path = match.group(1) if match else None
+        if name == 'ingest_pdf':
+            pdf_path = args.get('path')
             if not pdf_path:
                 return "Please specify the PDF file path ('file: yourfile.pdf') to ingest."
-            success = self.meeting_db.ingest_pdf_file(pdf_path)
-            return f"PDF '{pdf_path}' ingested for retrieval." if success else f"Failed to ingest '{pdf_path}'. Make sure the file exists."
+            # Parsing can take a while; answer now and let the guest check back
+            job_id = self.meeting.ingest_pdf(pdf_path)
+            return f"Started ingesting '{pdf_path}' as job {job_id}. Ask 'status of job {job_id}' to check on it."
 
         # Add plain text meeting file
-        if re.search(r'\badd\b.*\bmeeting file\b', text):
-            match_file = re.search(r"filename\s*[:=]\s*(\S+)", message, re.IGNORECASE)
-            match_content = re.search(r"content\s*[:=]\s*(.+)", message, re.IGNORECASE | re.DOTALL)
-            if not match_file or not match_content:
+        if name == 'add_file':
+            if 'filename' not in args or 'content' not in args:
                 return ("Please specify your 'filename:...' and 'content:...' to add a meeting file.")
-            filename = match_file.group(1)
-            content = match_content.group(1)
-            return self.add_meeting_file(filename, content)
+            return await self.add_meeting_file(args['filename'], args['content'])
 
         # Semantic search in meeting files
-        if re.search(r'\b(search|find|lookup|show)\b.*\b(meeting file|meeting|transcript|notes)\b', text):
-            query_match = re.search(r'(?:about|for|on|:)\s*(.*)', text)
-            query = query_match.group(1) if query_match else message
-            return self.search_meeting_files(query)
+        if name == 'search':
+            return await self.search_meeting_files(args['query'])
 
         # Retrieve content of a specific meeting file
-        if re.search(r'\b(get|show|retrieve|read)\b.*\b(meeting file|transcript|meeting)\b', text):
-            filename_match = re.search(r"filename\s*[:=]\s*(\S+)", message, re.IGNORECASE)
-            if not filename_match:
+        if name == 'retrieve':
+            if 'filename' not in args:
                 return "Please specify the filename with 'filename:<filename>'."
-            filename = filename_match.group(1)
-            return self.retrieve_meeting_file(filename)
+            return await self.retrieve_meeting_file(args['filename'], args.get('offset', 0))
 
         # Delete all meeting files
-        if re.search(r'\b(delete|remove|truncate|clear)\b.*(meeting files|transcripts|meetings|database)\b', text):
-            return self.truncate_meeting_files()
+        if name == 'delete_all':
+            return await self.truncate_meeting_files()
 
         # Otherwise, fallback message
         return (
@@ -85,36 +114,63 @@ class HotelReceptionistAgent(Agent):
             "For example: 'Add meeting file filename:notes.txt content:...'"
         )
 
-    def add_meeting_file(self, filename: str, content: str) -> str:
-        success = self.meeting_db.add_file(filename, content)
+    def describe_job(self, job_id: int) -> str:
+        job = self.meeting.job_status(job_id)
+        if not job:
+            return f"There is no job {job_id}."
+        if job['state'] == 'done':
+            return f"Job {job_id} finished: '{job['target']}' is ready for search."
+        if job['state'] == 'failed':
+            return f"Job {job_id} failed for '{job['target']}'. {job['error'] or 'Make sure the file exists.'}"
+        return f"Job {job_id} for '{job['target']}' is {job['state']}."
+
+    async def add_meeting_file(self, filename: str, content: str) -> str:
+        success = await self.meeting.add_file(filename, content)
         if success:
             return f"Meeting file '{filename}' added successfully."
         else:
             return f"Failed to add meeting file '{filename}' (maybe already exists)."
 
-    def search_meeting_files(self, query: str, top_k: int = 5) -> str:
-        results = self.meeting_db.vector_search(query, top_k)
+    async def search_meeting_files(self, query: str, top_k: int = 5) -> str:
+        results = await self.meeting.hybrid_search(query, top_k)
         if not results:
             return "No meeting files found matching your query."
         response = "Meeting files matching your query:\n\n"
         for r in results:
-            snippet = r["content"][:200].replace('\n', ' ')
+            snippet = r["snippet"]
             response += f"- {r['filename']} (Similarity: {r['similarity']:.3f}, Date: {r['created_at']})\n  {snippet}\n"
         return response
 
-    def retrieve_meeting_file(self, filename: str) -> str:
-        content = self.meeting_db.retrieve_file_content(filename)
-        if content:
-            return content
-        else:
+    async def retrieve_meeting_file(self, filename: str, offset: int = 0) -> str:
+        # One page at a time, so a long transcript never floods the session
+        page = await self.meeting.read_file(filename, offset)
+        if not page:
             return f"No meeting file found with filename '{filename}'."
+        if page["next_offset"] is None:
+            return page["text"]
+        return (
+            f"{page['text']}\n\n(Showing characters {page['offset']}-{page['next_offset']} of {page['total_length']}. "
+            f"Say 'get meeting file filename:{filename} offset:{page['next_offset']}' to continue.)"
+        )
 
-    def truncate_meeting_files(self) -> str:
-        self.meeting_db.truncate_files()
+    async def truncate_meeting_files(self) -> str:
+        await self.meeting.truncate_files()
         return "All meeting files have been deleted successfully."
 
+def prewarm(proc: agents.JobProcess):
+    # Runs once per worker process before it takes jobs: load the embedding
+    # model and open the meeting database so calls don't wait on either
+    prewarm_embedding_model()
+    meeting_db = MeetingDatabase()
+    proc.userdata["meeting"] = AsyncMeetingDatabase(meeting_db)
+    # Latency histograms plus the batcher and query cache counters, served on
+    # METRICS_PORT and/or logged every METRICS_LOG_INTERVAL seconds
+    REGISTRY.add_collector("embedding_batcher", meeting_db.encoder.stats)
+    REGISTRY.add_collector("meeting_query_cache", meeting_db.query_cache.stats)
+    start_from_env()
+
 async def entrypoint(ctx: agents.JobContext):
-    agent = HotelReceptionistAgent()
+    agent = HotelReceptionistAgent(meeting=ctx.proc.userdata.get("meeting"))
 
     session = AgentSession(
         llm=gemini.LLM(
@@ -123,12 +179,15 @@ async def entrypoint(ctx: agents.JobContext):
         )
     )
 
+    # Event callbacks must be synchronous, so each reply runs as its own task;
+    # the set keeps a reference until it finishes
+    replies = set()
+
     @session.on("user_input_transcribed")
-    async def handle_transcript(event):
-        msg = event.transcript
-        if event.is_final:
-            rag_response = await agent.handle_user_message(msg)
-            await session.send_message(rag_response)
+    def handle_transcript(event):
+        task = asyncio.create_task(agent.reply_to_transcript(session, event))
+        replies.add(task)
+        task.add_done_callback(replies.discard)
 
     await session.start(
         room=ctx.room,
@@ -155,10 +214,10 @@ def test_add_meeting_file():
     test_filename = "example_meeting.txt"
     test_content = "This is a test meeting transcript about hotel management and AI assistant development."
     print("Adding meeting file...")
-    result = agent.add_meeting_file(test_filename, test_content)
+    result = asyncio.run(agent.add_meeting_file(test_filename, test_content))
     print(result)
     print("\nRetrieving the same file content...")
-    retrieved_content = agent.retrieve_meeting_file(test_filename)
+    retrieved_content = asyncio.run(agent.retrieve_meeting_file(test_filename))
     print(retrieved_content if retrieved_content else "(File content not found)")
 
 def ingest_pdf_cli(agent: HotelReceptionistAgent, pdf_path: str):
@@ -168,6 +227,7 @@ def ingest_pdf_cli(agent: HotelReceptionistAgent, pdf_path: str):
         f"PDF '{pdf_path}' ingested for retrieval." if result
         else f"Failed to ingest '{pdf_path}'. Make sure the file exists."
     )
+
 #as the cli thingy isnt needed now for manual testing
 # if __name__ == "__main__":
 #     import sys
@@ -180,5 +240,5 @@ def ingest_pdf_cli(agent: HotelReceptionistAgent, pdf_path: str):
 #     else:
 #         agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
 
@@ -1,34 +1,62 @@
+import atexit
 import logging
 from typing import List, Dict, Optional, Tuple
-from dbdriver import HotelDatabase
+from dbdriver import HotelDatabase, AsyncHotelDatabase, ExcelExportWorker, parse_stay
 from datetime import datetime, timedelta
 from livekit.agents import function_tool, RunContext
+from metrics import REGISTRY, instrument
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize database
+# Initialize database; tools go through the async facade so queries run off the event loop
 db = HotelDatabase()
+async_db = AsyncHotelDatabase(db)
+
+# Excel export is refreshed in the background; bursts of bookings share one write
+exporter = ExcelExportWorker(db)
+atexit.register(exporter.stop)
+REGISTRY.add_collector("excel_export", exporter.status)
+
+def _records(table, limit: int) -> List[Dict]:
+    """First rows of a quote table as plain dicts, with missing values as None"""
+    head = table.head(limit)
+    return head.astype(object).where(head.notna(), None).to_dict('records')
 
 @function_tool()
+@instrument("tool.search_available_rooms")
 async def search_available_rooms(
     context: RunContext,
-    room_type: str = None
+    room_type: str = None,
+    check_in_date: str = None,
+    check_out_date: str = None
 ) -> Dict:
     """
     Search for available rooms by type or get all room types.
     
     Args:
         room_type: Specific room type to search for (optional). If not provided, returns all room types.
+        check_in_date: Check-in date (YYYY-MM-DD format, optional). Defaults to tonight.
+        check_out_date: Check-out date (YYYY-MM-DD format, optional). Required with check_in_date.
         
     Returns:
         Dictionary containing available rooms information or all room types with counts.
     """
-    logger.info(f"API: Searching for available rooms - type: {room_type}")
+    logger.info(f"API: Searching for available rooms - type: {room_type}, {check_in_date} to {check_out_date}")
+    
+    try:
+        if room_type:
+            rooms = await async_db.get_available_rooms_by_type(room_type, check_in_date, check_out_date)
+        else:
+            room_types = await async_db.get_all_room_types(check_in_date, check_out_date)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
     
     if room_type:
-        rooms = db.get_available_rooms_by_type(room_type)
         return {
             "success": True,
             "room_type": room_type,
@@ -36,7 +64,6 @@ async def search_available_rooms(
             "rooms": rooms
         }
     else:
-        room_types = db.get_all_room_types()
         return {
             "success": True,
             "total_room_types": len(room_types),
@@ -44,22 +71,33 @@ async def search_available_rooms(
         }
 
 @function_tool()
+@instrument("tool.check_room_availability")
 async def check_room_availability(
     context: RunContext,
-    room_type: str
+    room_type: str,
+    check_in_date: str = None,
+    check_out_date: str = None
 ) -> Dict:
     """
-    Check if a specific room type is available.
+    Check if a specific room type is available for the guest's dates.
     
     Args:
         room_type: Room type to check availability for.
+        check_in_date: Check-in date (YYYY-MM-DD format, optional). Defaults to tonight.
+        check_out_date: Check-out date (YYYY-MM-DD format, optional). Required with check_in_date.
         
     Returns:
         Dictionary containing availability status and details.
     """
-    logger.info(f"API: Checking availability for {room_type}")
+    logger.info(f"API: Checking availability for {room_type} from {check_in_date} to {check_out_date}")
     
-    rooms = db.get_available_rooms_by_type(room_type)
+    try:
+        rooms = await async_db.get_available_rooms_by_type(room_type, check_in_date, check_out_date)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
     is_available = len(rooms) > 0
     
     return {
@@ -71,6 +109,7 @@ async def check_room_availability(
     }
 
 @function_tool()
+@instrument("tool.get_room_pricing")
 async def get_room_pricing(
     context: RunContext,
     room_type: str
@@ -86,16 +125,15 @@ async def get_room_pricing(
     """
     logger.info(f"API: Getting pricing for {room_type}")
     
-    room_types = db.get_all_room_types()
-    for rt in room_types:
-        if rt['room_type'].lower() == room_type.lower():
-            return {
-                "success": True,
-                "room_type": rt['room_type'],
-                "min_price": rt['min_price'],
-                "max_price": rt['max_price'],
-                "available_rooms": rt['available_rooms']
-            }
+    rt = await async_db.get_room_type(room_type)
+    if rt:
+        return {
+            "success": True,
+            "room_type": rt['room_type'],
+            "min_price": rt['min_price'],
+            "max_price": rt['max_price'],
+            "available_rooms": rt['available_rooms']
+        }
     
     return {
         "success": False,
@@ -103,6 +141,7 @@ async def get_room_pricing(
     }
 
 @function_tool()
+@instrument("tool.book_room")
 async def book_room(
     context: RunContext,
     room_id: int,
@@ -122,28 +161,74 @@ async def book_room(
         special_occasion: Special occasion for potential discount (optional).
         
     Returns:
-        Dictionary containing booking result with success status, message, and final price.
+        Dictionary containing booking result with success status, message, and total price for the stay.
     """
     logger.info(f"API: Booking room {room_id} for {guest_name}")
     
-    success, message, final_price = db.book_room(
+    success, message, total_price = await async_db.book_room(
         room_id, guest_name, check_in_date, check_out_date, special_occasion
     )
     
     if success:
-        # Export to Excel after successful booking
-        db.export_to_excel()
-        logger.info("API: Booking successful, exported to Excel")
+        # Schedule an Excel refresh; the write happens off the request path
+        exporter.request_export()
+        logger.info("API: Booking successful, Excel export scheduled")
     
     return {
         "success": success,
         "message": message,
-        "final_price": final_price,
+        "total_price": total_price,
         "room_id": room_id,
         "guest_name": guest_name
     }
 
 @function_tool()
+@instrument("tool.book_rooms")
+async def book_rooms(
+    context: RunContext,
+    guest_name: str,
+    check_in_date: str,
+    check_out_date: str,
+    room_ids: List[int] = None,
+    room_type: str = None,
+    count: int = 1,
+    special_occasion: str = None
+) -> Dict:
+    """
+    Book several rooms at once for a group or family. Either all rooms are booked or none are.
+    
+    Args:
+        guest_name: Name of the guest the booking is under.
+        check_in_date: Check-in date (YYYY-MM-DD format).
+        check_out_date: Check-out date (YYYY-MM-DD format).
+        room_ids: Specific room IDs to book (optional).
+        room_type: Room type to book when no room IDs are given (optional).
+        count: Number of rooms of room_type to book (default 1).
+        special_occasion: Special occasion for potential discount (optional).
+        
+    Returns:
+        Dictionary containing booking result with success status, message, booked rooms, and total price.
+    """
+    logger.info(f"API: Group booking for {guest_name} - ids: {room_ids}, type: {room_type}, count: {count}")
+    
+    success, message, rooms, total_price = await async_db.book_rooms(
+        guest_name, check_in_date, check_out_date, room_ids, room_type, count, special_occasion
+    )
+    
+    if success:
+        exporter.request_export()
+        logger.info("API: Group booking successful, Excel export scheduled")
+    
+    return {
+        "success": success,
+        "message": message,
+        "total_price": total_price,
+        "rooms": rooms,
+        "guest_name": guest_name
+    }
+
+@function_tool()
+@instrument("tool.get_room_details")
 async def get_room_details(
     context: RunContext,
     room_id: int
@@ -159,7 +244,7 @@ async def get_room_details(
     """
     logger.info(f"API: Getting details for room {room_id}")
     
-    room_status = db.get_room_status(room_id)
+    room_status = await async_db.get_room_status(room_id)
     if room_status:
         return {
             "success": True,
@@ -172,6 +257,7 @@ async def get_room_details(
         }
 
 @function_tool()
+@instrument("tool.suggest_room_for_occasion")
 async def suggest_room_for_occasion(
     context: RunContext,
     occasion: str,
@@ -182,42 +268,86 @@ async def suggest_room_for_occasion(
     
     Args:
         occasion: Special occasion (e.g., honeymoon, birthday, anniversary).
-        budget: Maximum budget in dollars (optional).
+        budget: Maximum nightly budget in dollars, after any occasion discount (optional).
         
     Returns:
         Dictionary containing suggested rooms that match the occasion and budget.
     """
     logger.info(f"API: Suggesting rooms for {occasion} with budget {budget}")
     
-    room_types = db.get_all_room_types()
-    suggestions = []
-    
-    for rt in room_types:
-        if rt['available_rooms'] > 0:
-            # Check if within budget
-            if budget is None or rt['max_price'] <= budget:
-                suggestions.append({
-                    "room_type": rt['room_type'],
-                    "max_price": rt['max_price'],
-                    "available_rooms": rt['available_rooms'],
-                    "suitable_for": occasion
-                })
+    # Tonight's grid is priced in one pass on the database pool, off the event
+    # loop; for a one-night stay the total budget is the nightly budget
+    table = await async_db.bulk_quote([parse_stay()], [occasion], budgets=[budget], available_only=True)
+    if not table.empty:
+        table = table[table['within_budget']]
     
-    # Sort by price (lowest first)
-    suggestions.sort(key=lambda x: x['max_price'])
+    suggestions = [{
+        "room_type": row['room_type'],
+        "max_price": row['original_price'],
+        "nightly_price": row['nightly_price'],
+        "available_rooms": row['available_rooms'],
+        "suitable_for": occasion
+    } for row in _records(table, 3)]
     
     return {
         "success": True,
         "occasion": occasion,
         "budget": budget,
-        "suggestions": suggestions[:3]  # Top 3 suggestions
+        "suggestions": suggestions  # Top 3 suggestions, cheapest first
+    }
+
+@function_tool()
+@instrument("tool.quote_stay_options")
+async def quote_stay_options(
+    context: RunContext,
+    check_in_date: str,
+    check_out_date: str,
+    budget: float = None,
+    occasion: str = None,
+    max_options: int = 5
+) -> Dict:
+    """
+    Price every available room type for a stay in one call, cheapest total first.
+    Use this for questions like "what are my options under $500 for 3 nights".
+    
+    Args:
+        check_in_date: Check-in date (YYYY-MM-DD format).
+        check_out_date: Check-out date (YYYY-MM-DD format).
+        budget: Maximum total budget in dollars for the whole stay (optional).
+        occasion: Special occasion for potential discount (optional).
+        max_options: Maximum number of options to return (default 5).
+        
+    Returns:
+        Dictionary containing ranked options with nightly price, discount, and total price for the stay.
+    """
+    logger.info(f"API: Quoting options {check_in_date} to {check_out_date}, budget {budget}, occasion {occasion}")
+    
+    try:
+        table = await async_db.bulk_quote([(check_in_date, check_out_date)], [occasion],
+                                          budgets=[budget], available_only=True)
+    except ValueError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    if not table.empty:
+        table = table[table['within_budget']]
+    
+    return {
+        "success": True,
+        "check_in_date": check_in_date,
+        "check_out_date": check_out_date,
+        "budget": budget,
+        "options": _records(table.drop(columns=['budget', 'within_budget'], errors='ignore'), max_options)
     }
 
 @function_tool()
+@instrument("tool.calculate_discount")
 async def calculate_discount(
     context: RunContext,
     room_type: str,
-    occasion: str
+    occasion: str,
+    check_in_date: str = None
 ) -> Dict:
     """
     Calculate potential discount for a room type and occasion.
@@ -225,30 +355,25 @@ async def calculate_discount(
     Args:
         room_type: Room type to calculate discount for.
         occasion: Special occasion for discount calculation.
+        check_in_date: Check-in date (YYYY-MM-DD format, optional), for date-limited offers. Defaults to today.
         
     Returns:
-        Dictionary containing discount information including original price, discount amount, and final price.
+        Dictionary containing discount information including original price, discount amount, and nightly price.
     """
     logger.info(f"API: Calculating discount for {room_type} - {occasion}")
     
-    room_types = db.get_all_room_types()
-    for rt in room_types:
-        if rt['room_type'].lower() == room_type.lower():
-            # Calculate discount percentage
-            discount_percentage = db._calculate_discount(occasion)
-            max_price = rt['max_price']
-            discount_amount = max_price * (discount_percentage / 100)
-            final_price = max_price - discount_amount
-            
-            return {
-                "success": True,
-                "room_type": rt['room_type'],
-                "original_price": max_price,
-                "discount_percentage": discount_percentage,
-                "discount_amount": discount_amount,
-                "final_price": final_price,
-                "occasion": occasion
-            }
+    # Same pricing engine as book_room, so the quote matches what the guest will pay
+    quote = await async_db.quote_room_type(room_type, occasion, check_in_date)
+    if quote:
+        return {
+            "success": True,
+            "room_type": quote['room_type'],
+            "original_price": quote['original_price'],
+            "discount_percentage": quote['discount_percentage'],
+            "discount_amount": quote['discount_amount'],
+            "nightly_price": quote['nightly_price'],
+            "occasion": occasion
+        }
     
     return {
         "success": False,
@@ -256,6 +381,7 @@ async def calculate_discount(
     }
 
 @function_tool()
+@instrument("tool.get_booking_summary")
 async def get_booking_summary(
     context: RunContext
 ) -> Dict:
@@ -267,7 +393,7 @@ async def get_booking_summary(
     """
     logger.info("API: Getting booking summary")
     
-    room_types = db.get_all_room_types()
+    room_types = await async_db.get_all_room_types()
     total_rooms = sum(rt['total_rooms'] for rt in room_types)
     total_available = sum(rt['available_rooms'] for rt in room_types)
     total_occupied = total_rooms - total_available
@@ -280,5 +406,6 @@ async def get_booking_summary(
             "occupied_rooms": total_occupied,
             "occupancy_rate": (total_occupied / total_rooms * 100) if total_rooms > 0 else 0
         },
+        "excel_export": exporter.status(),
         "room_types": room_types
     } 
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""Concurrent booking stress test for HotelDatabase.
+
+Several worker processes, each running several threads, hammer one fresh
+database with overlapping booking requests. Afterwards the bookings table is
+checked for double bookings. Exits non-zero if any room was booked twice for
+overlapping dates.
+
+    python benchmarks/booking_stress.py --processes 4 --threads 8 --attempts 200
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbdriver import HotelDatabase
+
+OVERLAP_SQL = '''
+    SELECT COUNT(*) FROM bookings a
+    JOIN bookings b ON a.room_id = b.room_id AND a.booking_id < b.booking_id
+    WHERE a.check_in_date < b.check_out_date AND b.check_in_date < a.check_out_date
+'''
+
+
+def _worker(db_path: str, threads: int, attempts: int, days: int, seed: int, results):
+    db = HotelDatabase(db_path)
+    room_count = db.connections.connection().execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+    counts = {'booked': 0, 'rejected': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def run(thread_seed: int):
+        rng = random.Random(thread_seed)
+        start_day = date.today()
+        for _ in range(attempts):
+            check_in = start_day + timedelta(days=rng.randrange(days))
+            check_out = check_in + timedelta(days=rng.randint(1, 4))
+            success, message, _ = db.book_room(rng.randint(1, room_count), "Stress Guest",
+                                               check_in.isoformat(), check_out.isoformat())
+            with lock:
+                if success:
+                    counts['booked'] += 1
+                elif "already booked" in message:
+                    counts['rejected'] += 1
+                else:
+                    counts['errors'] += 1
+
+    pool = [threading.Thread(target=run, args=(seed * 1000 + i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    db.close()
+    results.put(counts)
+
+
+def run_stress(processes: int, threads: int, attempts: int, days: int, db_path: str = None) -> dict:
+    """Run the stress test and return throughput and conflict figures"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="booking-stress-"), "hotel.db")
+    HotelDatabase(db_path).close()
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, args=(db_path, threads, attempts, days, seed, results))
+               for seed in range(processes)]
+    started = time.perf_counter()
+    for p in workers:
+        p.start()
+    totals = {'booked': 0, 'rejected': 0, 'errors': 0}
+    for _ in workers:
+        for key, value in results.get().items():
+            totals[key] += value
+    for p in workers:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    with sqlite3.connect(db_path) as conn:
+        double_bookings = conn.execute(OVERLAP_SQL).fetchone()[0]
+        stored = conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+
+    attempted = processes * threads * attempts
+    return {
+        'processes': processes,
+        'threads': threads,
+        'attempted': attempted,
+        **totals,
+        'stored_bookings': stored,
+        'double_bookings': double_bookings,
+        'elapsed_seconds': elapsed,
+        'attempts_per_second': attempted / elapsed if elapsed else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=100, help="booking attempts per thread")
+    parser.add_argument("--days", type=int, default=60, help="spread of check-in dates")
+    parser.add_argument("--db", default=None, help="database path (default: a fresh temp file)")
+    args = parser.parse_args()
+
+    report = run_stress(args.processes, args.threads, args.attempts, args.days, args.db)
+    for key, value in report.items():
+        print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+    if report['double_bookings'] or report['stored_bookings'] != report['booked'] or report['errors']:
+        print("FAILED: bookings were lost, duplicated or errored")
+        sys.exit(1)
+    print("OK: no double bookings")
+
+
+if __name__ == "__main__":
+    main()
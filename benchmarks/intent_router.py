@@ -0,0 +1,133 @@
+"""Intent router corpus check and micro-benchmark.
+
+First checks every utterance in CORPUS against its expected intent and
+arguments, and exits non-zero on any mismatch. Then times intents.route per
+utterance next to the sequential regex cascade it replaced, for meeting
+commands and for ordinary booking chatter that matches no command.
+
+    python benchmarks/intent_router.py --repeat 20000
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import route
+
+# (utterance, expected intent or None, expected args subset)
+CORPUS = [
+    # PDF ingestion
+    ("Please ingest pdf file: minutes.pdf", 'ingest_pdf', {'path': 'minutes.pdf'}),
+    ("Add PDF path: /data/Q2 Review.pdf", 'ingest_pdf', {}),
+    ("add pdf path:/data/Q2_Review.pdf now", 'ingest_pdf', {'path': '/data/Q2_Review.pdf'}),
+    ("ingest file: board.pdf", 'ingest_pdf', {'path': 'board.pdf'}),
+    ("ingest the pdf filename:Board.PDF", 'ingest_pdf', {'path': 'Board.PDF'}),
+    ("ingest pdf", 'ingest_pdf', {}),
+    # Plain text files; content swallows the rest, so commands inside it are just text
+    ("Add meeting file filename:notes.txt content: Budget approved.", 'add_file',
+     {'filename': 'notes.txt', 'content': 'Budget approved.'}),
+    ("add meeting file filename:a.txt content:line one\nline two", 'add_file',
+     {'filename': 'a.txt', 'content': 'line one\nline two'}),
+    ("add meeting file filename:a.txt content: please ingest the pdf and delete all meetings", 'add_file',
+     {'content': 'please ingest the pdf and delete all meetings'}),
+    ("add meeting file content: notes here filename: b.txt", 'add_file',
+     {'filename': 'b.txt', 'content': 'notes here'}),
+    ("add meeting file", 'add_file', {}),
+    # Search; the query starts after the first about/for/on/":"
+    ("Search meeting files about the project timeline", 'search', {'query': 'the project timeline'}),
+    ("find transcripts on customer feedback", 'search', {'query': 'customer feedback'}),
+    ("search for meeting notes about budget", 'search', {'query': 'meeting notes about budget'}),
+    ("lookup notes: Q2 budget", 'search', {'query': 'q2 budget'}),
+    ("show meetings about conference planning", 'search', {'query': 'conference planning'}),
+    ("find the meeting where we talked about hiring", 'search', {'query': 'hiring'}),
+    # Retrieval; "show" retrieves only when a filename is given
+    ("Get meeting file filename:notes.txt", 'retrieve', {'filename': 'notes.txt'}),
+    ("read transcript filename:q2.txt offset:4000", 'retrieve', {'filename': 'q2.txt', 'offset': 4000}),
+    ("show meeting file filename:notes.txt", 'retrieve', {'filename': 'notes.txt'}),
+    ("get meeting file", 'retrieve', {}),
+    # Delete
+    ("Delete all meeting files", 'delete_all', {}),
+    ("please clear the database", 'delete_all', {}),
+    ("remove transcripts", 'delete_all', {}),
+    ("delete meeting file", None, {}),
+    # Jobs
+    ("status of job 3", 'job_status', {'job_id': 3}),
+    ("check job #12 progress", 'job_status', {'job_id': 12}),
+    ("cancel job 4", 'cancel_job', {'job_id': 4}),
+    ("stop job: 9 please", 'cancel_job', {'job_id': 9}),
+    # Booking chatter and near misses
+    ("I'd like to book a deluxe room for two nights", None, {}),
+    ("What's the price of the honeymoon suite?", None, {}),
+    ("Can you check availability for next Friday", None, {}),
+    ("We are here for a meeting with the sales team", None, {}),
+    ("my job is in sales", None, {}),
+    ("show me the spa menu", None, {}),
+    ("", None, {}),
+]
+
+CHATTER = [
+    "I'd like to book a deluxe room for two nights starting on the fifteenth",
+    "What's the price of the honeymoon suite with breakfast included?",
+    "Could you tell me whether the pool is open late on weekends",
+]
+COMMANDS = [utterance for utterance, intent, _ in CORPUS if intent][:8]
+
+
+def legacy_route(message: str):
+    """The sequential cascade handle_user_message used before intents.route"""
+    text = message.lower().strip()
+    if re.search(r'\b(add|ingest)\b.*\b(pdf)\b', text):
+        re.search(r"(?:path|file(?:name)?|file):\s*([^\s]+\.pdf)", message, re.IGNORECASE)
+        return 'ingest_pdf'
+    if re.search(r'\badd\b.*\bmeeting file\b', text):
+        re.search(r"filename\s*[:=]\s*(\S+)", message, re.IGNORECASE)
+        re.search(r"content\s*[:=]\s*(.+)", message, re.IGNORECASE | re.DOTALL)
+        return 'add_file'
+    if re.search(r'\b(search|find|lookup|show)\b.*\b(meeting file|meeting|transcript|notes)\b', text):
+        re.search(r'(?:about|for|on|:)\s*(.*)', text)
+        return 'search'
+    if re.search(r'\b(get|show|retrieve|read)\b.*\b(meeting file|transcript|meeting)\b', text):
+        re.search(r"filename\s*[:=]\s*(\S+)", message, re.IGNORECASE)
+        return 'retrieve'
+    if re.search(r'\b(delete|remove|truncate|clear)\b.*(meeting files|transcripts|meetings|database)\b', text):
+        return 'delete_all'
+    return None
+
+
+def check_corpus() -> int:
+    failures = 0
+    for utterance, expected, expected_args in CORPUS:
+        intent = route(utterance)
+        name, args = intent if intent else (None, {})
+        wrong = {key: args.get(key) for key, value in expected_args.items() if args.get(key) != value}
+        if name != expected or wrong:
+            failures += 1
+            print(f"FAIL {utterance!r}: got {name} {args}, expected {expected} {expected_args}")
+    print(f"corpus: {len(CORPUS) - failures}/{len(CORPUS)} utterances routed as expected")
+    return failures
+
+
+def time_per_call(func, utterances, repeat: int) -> float:
+    """Mean microseconds per utterance"""
+    elapsed = timeit.timeit(lambda: [func(u) for u in utterances], number=repeat)
+    return elapsed / (repeat * len(utterances)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5000, help="passes over each utterance set")
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    for label, utterances in (("commands", COMMANDS), ("chatter", CHATTER)):
+        new = time_per_call(route, utterances, args.repeat)
+        old = time_per_call(legacy_route, utterances, args.repeat)
+        print(f"{label:>9}: route {new:6.2f} us/utterance, legacy cascade {old:6.2f} us/utterance")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""Offline multi-session load test for the receptionist worker.
+
+Runs N simulated guest sessions concurrently on one event loop, the way a
+worker process hosts its jobs. Every guest utterance goes through
+HotelReceptionistAgent.reply_to_transcript as a fake user_input_transcribed
+event (one interim, one final), and a scripted stub LLM then calls the
+agent's function tools the way the real model would: search, then pricing
+and discount, then availability and booking, retrying once when another guest
+takes the room first. Some guests also ask about meeting notes. Everything runs
+in a temp directory against a stub embedding model; no LiveKit server, Gemini
+key or model download is needed.
+
+For each concurrency level the report shows turn throughput, turn and
+per-tool tail latency, event-loop lag and booking conflicts, and where
+throughput stops scaling or the turn p99 exceeds --slo-ms. Exits non-zero if
+any room ends up double booked.
+
+    python benchmarks/load_test.py --sessions 1,4,16,64 --conversations 5 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+from booking_stress import OVERLAP_SQL
+from dbdriver import EMBEDDING_MODEL_NAME, AsyncMeetingDatabase, MeetingDatabase, set_embedding_model
+from metrics import REGISTRY, timer
+
+OCCASIONS = [None, None, "honeymoon", "birthday", "anniversary"]
+MEETING_COMMANDS = [
+    "search meeting files about {topic}",
+    "find transcripts on {topic} and {other}",
+    "get meeting file filename:{filename}",
+]
+BUSY_REPLY = "I'm still working on other meeting requests"
+
+
+class TranscriptEvent(NamedTuple):
+    """The fields of user_input_transcribed that the agent reads"""
+    transcript: str
+    is_final: bool
+
+
+class FakeSession:
+    """Stands in for AgentSession and keeps what the agent would have said"""
+
+    def __init__(self):
+        self.messages: List[str] = []
+
+    async def send_message(self, message: str):
+        self.messages.append(message)
+
+
+class SimulatedGuest:
+    """One voice session: fake transcripts plus a scripted stub LLM calling the agent's tools.
+
+    Tools are called by name with keyword arguments through the agent's
+    FunctionTool objects, as the LiveKit tool executor does. `llm_ms` is
+    slept before each turn to stand in for STT and model time; it is not part
+    of the measured turn latency.
+    """
+
+    def __init__(self, agent, meeting_files: int, rng: random.Random, options, stats: Counter):
+        self.agent = agent
+        self.tools = {tool.info.name: tool for tool in agent.tools}
+        self.session = FakeSession()
+        self.meeting_files = meeting_files
+        self.rng = rng
+        self.options = options
+        self.stats = stats
+
+    async def say(self, transcript: str):
+        words = transcript.split()
+        await self.agent.reply_to_transcript(self.session, TranscriptEvent(" ".join(words[:len(words) // 2]), False))
+        await self.agent.reply_to_transcript(self.session, TranscriptEvent(transcript, True))
+
+    async def tool(self, name: str, **arguments) -> Dict:
+        self.stats['tool_calls'] += 1
+        return await self.tools[name](None, **arguments)
+
+    async def turn(self, transcript: str, respond=None):
+        """One guest utterance and the tool calls the model makes in response"""
+        if self.options.llm_ms:
+            await asyncio.sleep(self.options.llm_ms / 1000)
+        with timer("session.turn"):
+            await self.say(transcript)
+            result = await respond() if respond else None
+        self.stats['turns'] += 1
+        return result
+
+    async def run(self, conversations: int, window_start: date):
+        for _ in range(conversations):
+            await self.conversation(window_start)
+
+    async def conversation(self, window_start: date):
+        rng = self.rng
+        check_in = window_start + timedelta(days=rng.randrange(self.options.days))
+        stay = {'check_in_date': check_in.isoformat(),
+                'check_out_date': (check_in + timedelta(days=rng.randint(1, 4))).isoformat()}
+        occasion = rng.choice(OCCASIONS)
+        guest = rng.choice(synthetic.GUESTS)
+
+        found = await self.turn(f"Hi, what rooms do you have from {stay['check_in_date']} to {stay['check_out_date']}?",
+                                lambda: self.tool("search_available_rooms", **stay))
+        open_types = [rt['room_type'] for rt in found.get('room_types', []) if rt['available_rooms'] > 0]
+        if not open_types:
+            self.stats['sold_out'] += 1
+            return
+        room_type = rng.choice(open_types)
+
+        async def pricing():
+            await self.tool("get_room_pricing", room_type=room_type)
+            if occasion:
+                await self.tool("calculate_discount", room_type=room_type, occasion=occasion,
+                                check_in_date=stay['check_in_date'])
+        await self.turn(f"How much is the {room_type} room" + (f" for our {occasion}?" if occasion else "?"), pricing)
+
+        if rng.random() < self.options.meeting_ratio:
+            await self.turn(rng.choice(MEETING_COMMANDS).format(
+                topic=rng.choice(synthetic.WORDS), other=rng.choice(synthetic.WORDS),
+                filename=f"synthetic_0_{rng.randrange(self.meeting_files)}.txt"))
+            if self.session.messages[-1].startswith(BUSY_REPLY):
+                self.stats['meeting_busy'] += 1
+
+        async def book() -> Optional[Dict]:
+            # Like the model, take the first free room; retry once if someone else got it
+            for _ in range(2):
+                available = await self.tool("check_room_availability", room_type=room_type, **stay)
+                if not available.get('rooms'):
+                    return None
+                booked = await self.tool("book_room", room_id=available['rooms'][0]['room_id'], guest_name=guest,
+                                         special_occasion=occasion, **stay)
+                if booked['success']:
+                    return booked
+                self.stats['conflicts'] += 1
+            return None
+        booked = await self.turn(f"Great, please book it under {guest}.", book)
+        self.stats['booked' if booked else 'not_booked'] += 1
+
+
+async def monitor_loop_lag(samples: List[float], interval: float, stop: asyncio.Event):
+    """Record how late each sleep wakes up; anything blocking the loop shows up here"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+async def run_level(agent, sessions: int, window_start: date, options) -> Dict:
+    """Run `sessions` guests at once and summarize the level"""
+    REGISTRY.reset()
+    stats = Counter()
+    lags: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lags, options.lag_interval_ms / 1000, stop))
+    guests = [SimulatedGuest(agent, options.meeting_files, random.Random(sessions * 1000 + i), options, stats)
+              for i in range(sessions)]
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(g.run(options.conversations, window_start) for g in guests),
+                                    return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    for error in errors[:3]:
+        print(f"  session failed: {error!r}")
+    operations = REGISTRY.snapshot()['operations']
+    turn = operations.get('session.turn', {})
+    lags.sort()
+    return {
+        'sessions': sessions,
+        'elapsed_seconds': elapsed,
+        'turns': stats['turns'],
+        'turns_per_second': stats['turns'] / elapsed if elapsed else 0,
+        'bookings_per_second': stats['booked'] / elapsed if elapsed else 0,
+        'turn_p50_ms': turn.get('p50_ms', 0),
+        'turn_p95_ms': turn.get('p95_ms', 0),
+        'turn_p99_ms': turn.get('p99_ms', 0),
+        'loop_lag_p99_ms': percentile(lags, 0.99) * 1000,
+        'loop_lag_max_ms': lags[-1] * 1000 if lags else 0,
+        'tool_calls': stats['tool_calls'],
+        'booked': stats['booked'],
+        'not_booked': stats['not_booked'],
+        'conflicts': stats['conflicts'],
+        'sold_out': stats['sold_out'],
+        'meeting_busy': stats['meeting_busy'],
+        'session_errors': len(errors),
+        'operations': {name: op for name, op in operations.items() if name != 'session.turn'},
+    }
+
+
+def find_saturation(levels: List[Dict], slo_ms: float) -> Optional[str]:
+    """Describe the first level where the turn p99 breaks the budget or throughput stops growing"""
+    previous = None
+    for level in levels:
+        if level['turn_p99_ms'] > slo_ms:
+            return (f"turn p99 {level['turn_p99_ms']:.0f} ms exceeds {slo_ms:.0f} ms at {level['sessions']} sessions")
+        if previous and level['turns_per_second'] < previous['turns_per_second'] * 1.1:
+            return (f"throughput stops scaling after {previous['sessions']} sessions "
+                    f"({previous['turns_per_second']:.0f} -> {level['turns_per_second']:.0f} turns/s)")
+        previous = level
+    return None
+
+
+def print_report(levels: List[Dict]):
+    print(f"{'sessions':>8} {'turns/s':>9} {'books/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'lag p99':>8} {'lag max':>8} {'booked':>7} {'conflict':>8} {'soldout':>7} {'busy':>5} {'errors':>6}")
+    for level in levels:
+        print(f"{level['sessions']:>8} {level['turns_per_second']:>9.1f} {level['bookings_per_second']:>8.1f} "
+              f"{level['turn_p50_ms']:>8.2f} {level['turn_p95_ms']:>8.2f} {level['turn_p99_ms']:>8.2f} "
+              f"{level['loop_lag_p99_ms']:>8.2f} {level['loop_lag_max_ms']:>8.2f} {level['booked']:>7} "
+              f"{level['conflicts']:>8} {level['sold_out']:>7} {level['meeting_busy']:>5} {level['session_errors']:>6}")
+
+    top = levels[-1]
+    print(f"\nPer-operation latency at {top['sessions']} sessions:")
+    for name, op in top['operations'].items():
+        print(f"  {name:<36} {op['calls']:>7} calls  p50 {op['p50_ms']:8.2f}  p95 {op['p95_ms']:8.2f}  "
+              f"p99 {op['p99_ms']:8.2f} ms  errors {op['errors']}")
+
+
+async def run(options) -> List[Dict]:
+    # api.py opens hotel.db and the Excel export in the working directory at
+    # import, so the agent is imported only after moving into the temp dir
+    import api
+    from agent import HotelReceptionistAgent
+
+    synthetic.seed_rooms(api.db, options.rooms_per_type)
+    meeting_db = MeetingDatabase("meeting.db")
+    synthetic.seed_meeting_rows(meeting_db, options.meeting_files, seed=0)
+    meeting_db.close()
+    meeting = AsyncMeetingDatabase(MeetingDatabase("meeting.db"))
+    agent = HotelReceptionistAgent(meeting=meeting)
+
+    levels = []
+    try:
+        for i, sessions in enumerate(options.sessions):
+            # Each level books into its own date window, so earlier levels do not fill the hotel
+            window_start = date.today() + timedelta(days=1 + i * (options.days + 5))
+            levels.append(await run_level(agent, sessions, window_start, options))
+            print(f"{sessions} sessions: {levels[-1]['turns']} turns in {levels[-1]['elapsed_seconds']:.1f}s")
+    finally:
+        meeting.shutdown()
+        api.exporter.stop()
+        api.async_db.shutdown()
+
+    with sqlite3.connect(api.db.connections.db_path) as conn:
+        double_bookings = conn.execute(OVERLAP_SQL).fetchone()[0]
+    for level in levels:
+        level['double_bookings'] = double_bookings
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--conversations", type=int, default=5, help="guest conversations per session and level")
+    parser.add_argument("--rooms-per-type", type=int, default=10)
+    parser.add_argument("--days", type=int, default=14, help="spread of check-in dates per level")
+    parser.add_argument("--meeting-ratio", type=float, default=0.2, help="share of conversations with a meeting command")
+    parser.add_argument("--meeting-files", type=int, default=500)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="simulated STT + model time before each turn")
+    parser.add_argument("--embed-ms", type=float, default=2.0, help="simulated cost of one embedding batch")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="turn p99 budget used to call saturation")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--keep", action="store_true", help="keep the temp directory with the databases")
+    parser.add_argument("--verbose", action="store_true", help="keep the per-call INFO logs")
+    options = parser.parse_args()
+    options.sessions = [int(n) for n in options.sessions.split(",")]
+    output = os.path.abspath(options.output) if options.output else None
+
+    set_embedding_model(synthetic.StubEmbeddingModel(latency_ms=options.embed_ms), EMBEDDING_MODEL_NAME)
+    workdir = tempfile.mkdtemp(prefix="fyp-load-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if not options.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        levels = asyncio.run(run(options))
+    finally:
+        os.chdir(cwd)
+        if options.keep:
+            print(f"Load test data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_report(levels)
+    saturation = find_saturation(levels, options.slo_ms)
+    print(f"\nSaturation: {saturation}" if saturation else "\nNo saturation within the tested levels")
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'options': {k: v for k, v in vars(options).items() if k != 'output'},
+                       'saturation': saturation, 'levels': levels}, f, indent=2)
+        print(f"Results written to {output}")
+
+    if levels and levels[-1]['double_bookings']:
+        print(f"FAILED: {levels[-1]['double_bookings']} double booking(s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Offline benchmark suite for the hotel and meeting data paths.
+
+Builds synthetic databases in a temp directory, registers a stub embedding
+model (no download, no GPU), times each operation and writes the results as
+JSON. With --baseline, every result is compared against a saved run and the
+script exits non-zero if anything regressed by more than --threshold.
+
+    python benchmarks/run_benchmarks.py --profile quick --output bench.json
+    python benchmarks/run_benchmarks.py --profile quick --baseline bench.json
+
+Latency results carry p50/p95/mean in milliseconds (lower is better);
+throughput results carry ops_per_second (higher is better).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+from booking_stress import run_stress
+from dbdriver import EMBEDDING_MODEL_NAME, HotelDatabase, MeetingDatabase, set_embedding_model
+
+PROFILES = {
+    'quick': {
+        'repeat': 50,
+        'rooms_per_type': 25,
+        'availability_bookings': 10_000,
+        'writers': [1, 4, 16],
+        'booking_attempts': 25,
+        'export_bookings': [1_000],
+        'meeting_adds': 50,
+        'meeting_rows': [1_000, 10_000],
+        'pdfs': 20,
+    },
+    'full': {
+        'repeat': 200,
+        'rooms_per_type': 100,
+        'availability_bookings': 100_000,
+        'writers': [1, 4, 16, 64],
+        'booking_attempts': 50,
+        'export_bookings': [1_000, 100_000],
+        'meeting_adds': 200,
+        'meeting_rows': [1_000, 10_000, 100_000],
+        'pdfs': 200,
+    },
+}
+
+
+def measure(func, repeat: int, warmup: int = 3) -> dict:
+    """Call func() repeat times and summarize the latencies"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'n': repeat,
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean_ms': statistics.fmean(samples),
+    }
+
+
+def once(func):
+    """Time a single call; returns (result entry, the call's return value)"""
+    started = time.perf_counter()
+    value = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    return {'n': 1, 'p50_ms': elapsed, 'p95_ms': elapsed, 'mean_ms': elapsed}, value
+
+
+def random_stay(rng: random.Random, spread_days: int = 90):
+    check_in = date.today() + timedelta(days=rng.randrange(-spread_days, spread_days))
+    return check_in.isoformat(), (check_in + timedelta(days=rng.randint(1, 5))).isoformat()
+
+
+def bench_hotel(profile: dict, workdir: str, results: dict):
+    rng = random.Random(1)
+    db = HotelDatabase(os.path.join(workdir, "hotel.db"))
+    synthetic.seed_rooms(db, profile['rooms_per_type'])
+    synthetic.seed_bookings(db, profile['availability_bookings'], seed=1)
+    room_types = [rt['room_type'] for rt in db.get_all_room_types()]
+
+    results['hotel.availability_by_type'] = measure(
+        lambda: db.get_available_rooms_by_type(rng.choice(room_types), *random_stay(rng)), profile['repeat'])
+    results['hotel.room_type_aggregates'] = measure(
+        lambda: db.get_all_room_types(*random_stay(rng)), profile['repeat'])
+    results['hotel.room_type_aggregates_cached'] = measure(db.get_all_room_types, profile['repeat'])
+    results['hotel.bulk_quote_grid'] = measure(
+        lambda: db.bulk_quote([random_stay(rng) for _ in range(4)], [None, "honeymoon", "birthday"]),
+        profile['repeat'])
+    db.close()
+
+    for writers in profile['writers']:
+        report = run_stress(1, writers, profile['booking_attempts'], 30,
+                            os.path.join(workdir, f"stress_{writers}.db"))
+        results[f'hotel.booking_throughput.writers_{writers}'] = {
+            'n': report['attempted'],
+            'ops_per_second': report['attempts_per_second'],
+            'booked': report['booked'],
+            'double_bookings': report['double_bookings'],
+        }
+
+    for bookings in profile['export_bookings']:
+        db = HotelDatabase(os.path.join(workdir, f"export_{bookings}.db"))
+        synthetic.seed_bookings(db, bookings, seed=2)
+        target = os.path.join(workdir, f"export_{bookings}.xlsx")
+        results[f'hotel.export_to_excel.bookings_{bookings}'], _ = once(lambda: db.export_to_excel(target))
+        db.close()
+
+
+def bench_meeting(profile: dict, workdir: str, results: dict):
+    rng = random.Random(3)
+    db = MeetingDatabase(os.path.join(workdir, "meeting_add.db"))
+    counter = iter(range(10 ** 9))
+    results['meeting.add_file'] = measure(
+        lambda: db.add_file(f"add_{next(counter)}.txt", synthetic.sentence(rng, 120)), profile['meeting_adds'])
+    db.close()
+
+    for rows in profile['meeting_rows']:
+        path = os.path.join(workdir, f"meeting_{rows}.db")
+        db = MeetingDatabase(path)
+        synthetic.seed_meeting_rows(db, rows, seed=rows)
+        db.close()
+        # Reopening rebuilds the sidecar from the seeded rows
+        results[f'meeting.open_and_index.rows_{rows}'], db = once(lambda: MeetingDatabase(path))
+        # Distinct queries each time, so the query cache does not hide the encode
+        results[f'meeting.vector_search.rows_{rows}'] = measure(
+            lambda: db.vector_search(synthetic.sentence(rng, 6) + f" {rng.random()}", 5), profile['repeat'])
+        results[f'meeting.hybrid_search.rows_{rows}'] = measure(
+            lambda: db.hybrid_search(synthetic.sentence(rng, 3) + f" {rng.random()}", 5), profile['repeat'])
+        results[f'meeting.hybrid_search_rare.rows_{rows}'] = measure(
+            lambda: db.hybrid_search(f"{synthetic.sentence(rng, 3)} {synthetic.project_code(rng, rows)}", 5),
+            profile['repeat'])
+        results[f'meeting.read_file_page.rows_{rows}'] = measure(
+            lambda: db.read_file(f"synthetic_{rows}_{rng.randrange(rows)}.txt", 0, 200), profile['repeat'])
+        db.close()
+
+    pdf_dir = os.path.join(workdir, "pdfs")
+    synthetic.write_meeting_pdfs(pdf_dir, profile['pdfs'])
+    db = MeetingDatabase(os.path.join(workdir, "meeting_pdf.db"))
+    started = time.perf_counter()
+    stats = db.ingest_pdfs(pdf_dir)
+    elapsed = time.perf_counter() - started
+    results['meeting.ingest_pdfs'] = {
+        'n': stats['ingested'],
+        'ops_per_second': stats['ingested'] / elapsed if elapsed else 0,
+        'failed': stats['failed'],
+    }
+    results['meeting.ingest_pdfs_unchanged'], _ = once(lambda: db.ingest_pdfs(pdf_dir))
+    db.close()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Results that got worse than the baseline by more than threshold (0.2 = 20%)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if 'p50_ms' in current and previous.get('p50_ms'):
+            change = current['p50_ms'] / previous['p50_ms'] - 1
+            metric = 'p50_ms'
+        elif 'ops_per_second' in current and previous.get('ops_per_second'):
+            change = previous['ops_per_second'] / current['ops_per_second'] - 1 if current['ops_per_second'] else 1
+            metric = 'ops_per_second'
+        else:
+            continue
+        if change > 0:
+            verdict = f"{change:.0%} worse" + ("  REGRESSION" if change > threshold else "")
+        else:
+            verdict = f"{-change:.0%} better"
+        print(f"{name:<48} {metric:>15} {previous[metric]:>12.3f} -> {current[metric]:>12.3f}  {verdict}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default='quick')
+    parser.add_argument("--only", choices=['hotel', 'meeting'], help="run one half of the suite")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previously written results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--keep", action="store_true", help="keep the temp directory with the generated data")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    set_embedding_model(synthetic.StubEmbeddingModel(), EMBEDDING_MODEL_NAME)
+    workdir = tempfile.mkdtemp(prefix="fyp-bench-")
+    results = {}
+    try:
+        if args.only in (None, 'hotel'):
+            bench_hotel(profile, workdir, results)
+        if args.only in (None, 'meeting'):
+            bench_meeting(profile, workdir, results)
+    finally:
+        if args.keep:
+            print(f"Benchmark data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, result in results.items():
+        summary = (f"p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms" if 'p50_ms' in result
+                   else f"{result['ops_per_second']:9.1f} ops/s")
+        print(f"{name:<48} {summary}")
+
+    report = {
+        'meta': {
+            'profile': args.profile,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    failed = any(r.get('double_bookings') for r in results.values())
+    if failed:
+        print("FAILED: double bookings during the throughput benchmark")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('profile') != args.profile:
+            print(f"Warning: baseline was recorded with profile '{baseline.get('meta', {}).get('profile')}'")
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f"FAILED: {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Synthetic data and a stub embedding model for the offline benchmarks.
+
+Everything here is deterministic for a given seed, needs no network or model
+download, and writes straight to SQLite, so large fixtures build in seconds.
+"""
+import os
+import random
+import sys
+import time
+import zlib
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dbdriver import EmbeddingIndex, encode_embedding, _content_hash
+
+WORDS = ("budget timeline deliverables review hiring roadmap customer feedback launch marketing spa "
+         "renovation staffing revenue forecast occupancy pricing suite breakfast wedding conference "
+         "vendor contract audit training safety housekeeping maintenance kitchen menu event quarter").split()
+
+GUESTS = ["Alice Fernandez", "Bob Osei", "Chen Wei", "Dana Kowalski", "Eli Haddad", "Farah Khan",
+          "Goran Petrov", "Hana Sato", "Ivan Rossi", "Jia Li"]
+
+
+class StubEmbeddingModel:
+    """Drop-in for SentenceTransformer.encode with hashed bag-of-words vectors.
+
+    Texts sharing words get similar vectors, so search results are
+    meaningful, and `latency_ms` / `per_item_ms` can mimic the cost of a real
+    forward pass so batching effects show up in timings.
+    """
+
+    def __init__(self, dim: int = 384, latency_ms: float = 0.0, per_item_ms: float = 0.0):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            h = zlib.crc32(word.encode('utf-8'))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vector
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.latency_ms or self.per_item_ms:
+            time.sleep((self.latency_ms + self.per_item_ms * len(texts)) / 1000)
+        vectors = np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        return vectors[0] if single else vectors
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_rooms(db, per_type: int):
+    """Add rooms until every sample room type has `per_type` rooms"""
+    with db.connections.transaction() as conn:
+        types = conn.execute("SELECT room_type, MIN(price_min), MAX(price_max), COUNT(*) FROM rooms "
+                             "GROUP BY room_type").fetchall()
+        number = conn.execute("SELECT MAX(room_number) FROM rooms").fetchone()[0] + 1
+        rows = []
+        for room_type, price_min, price_max, count in types:
+            for _ in range(per_type - count):
+                rows.append((number, room_type, price_min, price_max))
+                number += 1
+        conn.executemany("INSERT INTO rooms (room_number, room_type, price_min, price_max) VALUES (?, ?, ?, ?)", rows)
+    db.inventory.invalidate()
+
+
+def seed_bookings(db, count: int, seed: int = 0, start: date = None):
+    """Insert `count` non-overlapping bookings spread across all rooms, around `start` (default today)"""
+    rng = random.Random(seed)
+    conn = db.connections.connection()
+    room_ids = [row[0] for row in conn.execute("SELECT room_id FROM rooms ORDER BY room_id")]
+    per_room = -(-count // len(room_ids))
+    # Half the history lies before `start`, half after, so availability checks hit both
+    first_day = (start or date.today()) - timedelta(days=per_room * 2)
+    rows = []
+    for room_id in room_ids:
+        day = first_day
+        for _ in range(per_room):
+            if len(rows) == count:
+                break
+            day += timedelta(days=rng.randint(0, 2))
+            nights = rng.randint(1, 3)
+            rows.append((room_id, rng.choice(GUESTS), day.isoformat(), (day + timedelta(days=nights)).isoformat(),
+                         round(rng.uniform(50, 600) * nights, 2)))
+            day += timedelta(days=nights)
+    with db.connections.transaction() as c:
+        c.executemany("INSERT INTO bookings (room_id, guest_name, check_in_date, check_out_date, total_amount) "
+                      "VALUES (?, ?, ?, ?, ?)", rows)
+    db.analyze()
+    db.inventory.invalidate()
+
+
+def project_code(rng: random.Random, count: int) -> str:
+    """One of the count // 20 project codes used by seed_meeting_rows"""
+    return f"prj{rng.randrange(max(1, count // 20))}"
+
+
+def seed_meeting_rows(db, count: int, seed: int = 0, words: int = 60, batch_size: int = 5000):
+    """Insert `count` one-passage meeting files with random unit embeddings, bypassing the model.
+
+    Every text ends with a project code shared by about 20 files (see
+    project_code), a rare keyword for hybrid search to prefilter on. The
+    sidecar index is not updated; reopen the MeetingDatabase to rebuild it.
+    """
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed)
+    for first in range(0, count, batch_size):
+        n = min(batch_size, count - first)
+        texts = [f"{sentence(rng, words)} project {project_code(rng, count)}" for _ in range(n)]
+        embeddings = EmbeddingIndex._normalize(vectors.standard_normal((n, 384)))
+        with db.connections.transaction() as conn:
+            for i, (text, vector) in enumerate(zip(texts, embeddings)):
+                blob = encode_embedding(vector)
+                cursor = conn.execute(
+                    "INSERT INTO meeting_files (filename, content, embedding, content_hash) VALUES (?, ?, ?, ?)",
+                    (f"synthetic_{seed}_{first + i}.txt", text, blob, _content_hash(text)))
+                conn.execute("INSERT INTO meeting_chunks (file_id, chunk_index, start_offset, end_offset, embedding) "
+                             "VALUES (?, 0, 0, ?, ?)", (cursor.lastrowid, len(text), blob))
+    db.analyze()
+
+
+def write_pdf(path: str, lines):
+    """Write a minimal one-page PDF with the given text lines (no PDF library needed)"""
+    def escape(line: str) -> str:
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_meeting_pdfs(directory: str, count: int, seed: int = 0, lines: int = 40):
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        write_pdf(os.path.join(directory, f"meeting_{i:05d}.pdf"), [sentence(rng, 10) for _ in range(lines)])
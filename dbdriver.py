@@ -4,69 +4,572 @@ import logging
 import pickle
 import numpy as np
 import os
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime
-from sentence_transformers import SentenceTransformer
+import re
+import struct
+import time
+import random
+import tempfile
+import asyncio
+import functools
+import glob
+import hashlib
+import multiprocessing
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Optional, Tuple
+from datetime import datetime, date, timedelta
 import pdfplumber
+from metrics import REGISTRY, instrument
+
+try:
+    import fcntl
+except ImportError:  # Windows: sidecar writers are only serialized within one process
+    fcntl = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Pragmas applied to every pooled connection. WAL lets readers run alongside a
+# booking writer; NORMAL sync is durable enough under WAL and skips an fsync
+# per commit; cache_size is in KiB when negative.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+    # Off by default in SQLite; meeting_chunks relies on ON DELETE CASCADE
+    "foreign_keys": "ON",
+}
+
+class ConnectionManager:
+    """Hands out one long-lived SQLite connection per thread.
+
+    Connections are opened lazily on first use in a thread and kept until
+    close_all(). Each connection keeps its own prepared-statement cache, so
+    the SQL strings used by the database classes are compiled once per thread.
+    Connections run in autocommit mode; use transaction() to group writes.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict] = None, cached_statements: int = 256):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        logger.info(f"Opening SQLite connection to {self.db_path} on thread {threading.current_thread().name}")
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """Run a block inside BEGIN/COMMIT on this thread's connection.
+
+        immediate=True takes the write lock up front (BEGIN IMMEDIATE) instead
+        of upgrading from a read lock part way through.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def write(self, func, retries: int = 5, backoff_seconds: float = 0.01):
+        """Run func(conn) in a short BEGIN IMMEDIATE transaction and return its result.
+
+        busy_timeout already makes SQLite wait for the write lock; if it still
+        reports the database as busy or locked, the whole transaction is
+        retried up to `retries` times with jittered exponential backoff.
+        func must therefore only touch the database through conn.
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.transaction(immediate=True) as conn:
+                    return func(conn)
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if attempt == retries or ("locked" not in message and "busy" not in message):
+                    raise
+                delay = backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+                REGISTRY.increment("db.write_retries")
+                logger.warning(f"Database busy, retrying write in {delay * 1000:.0f} ms ({attempt + 1}/{retries})")
+                time.sleep(delay)
+
+    def close_all(self):
+        """Close every connection handed out by this manager"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing SQLite connection: {e}")
+        self._local = threading.local()
+
+def run_migrations(conn: sqlite3.Connection, migrations: List[Tuple], name: str) -> int:
+    """Bring a database up to the newest step in `migrations`.
+
+    Each migration is a (version, description, steps) tuple, where steps is a
+    sequence of SQL statements and/or callables taking the connection. The
+    schema version lives in PRAGMA user_version and is bumped in the same
+    transaction as the step, so a failed step leaves the database untouched
+    and concurrent workers never apply a step twice. Returns the number of
+    steps applied.
+    """
+    applied = 0
+    for version, description, steps in migrations:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                logger.info(f"Migrating {name} to schema v{version}: {description}")
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                applied += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    return applied
+
+def analyze_database(conn: sqlite3.Connection):
+    """Refresh the query planner statistics"""
+    logger.info("Running ANALYZE")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+
+# A room is free for the stay [start, end) when the last booking that starts
+# before `end` has checked out by `start`. Bookings of one room never overlap,
+# so that single row decides it, and idx_bookings_room_stay finds it with one
+# index seek per room however long the booking history is.
+# Parameters: (end, start). ROOM_FREE_TEMPLATE takes the two as SQL
+# expressions instead, e.g. columns of a table of stays.
+ROOM_FREE_TEMPLATE = '''
+    COALESCE((SELECT b.check_out_date FROM bookings b
+              WHERE b.room_id = r.room_id AND b.check_in_date < {end}
+              ORDER BY b.check_in_date DESC LIMIT 1), '') <= {start}
+'''
+ROOM_FREE_SQL = ROOM_FREE_TEMPLATE.format(end='?', start='?')
+
+# Joins each room r to the booking b that covers today, if any. Occupancy and
+# the current guest always come from here: the rooms table's is_occupied and
+# guest columns are left over from the first schema and no longer written.
+# Parameters: (today, today).
+CURRENT_STAY_JOIN_SQL = '''
+    LEFT JOIN bookings b ON b.booking_id = (
+        SELECT booking_id FROM bookings
+        WHERE room_id = r.room_id AND check_in_date <= ?
+        ORDER BY check_in_date DESC LIMIT 1
+    ) AND b.check_out_date > ?
+'''
+
+# Inserts the booking only if the room is still free for the stay; a rowcount
+# of 0 means someone else got there first. Parameters: (guest_name,
+# check_in_date, check_out_date, total_amount, discount_amount,
+# special_occasion, room_id, check_out_date, check_in_date).
+CLAIM_ROOM_SQL = '''
+    INSERT INTO bookings (room_id, guest_name, check_in_date, check_out_date,
+                          total_amount, discount_amount, special_occasion)
+    SELECT r.room_id, ?, ?, ?, ?, ?, ?
+    FROM rooms r
+    WHERE r.room_id = ? AND ''' + ROOM_FREE_SQL + '''
+'''
+
+class _BookingRejected(Exception):
+    """Raised inside a booking transaction to roll it back with a guest-facing reason"""
+
+def parse_stay(check_in_date: Optional[str] = None, check_out_date: Optional[str] = None) -> Tuple[str, str]:
+    """Validate a stay and return it as ISO dates; defaults to tonight.
+
+    Raises ValueError for malformed dates or a check-out not after check-in.
+    """
+    if not check_in_date and not check_out_date:
+        today = date.today()
+        return today.isoformat(), (today + timedelta(days=1)).isoformat()
+    if not check_in_date or not check_out_date:
+        raise ValueError("Both check-in and check-out dates are required (YYYY-MM-DD)")
+    try:
+        start = datetime.strptime(check_in_date, "%Y-%m-%d").date()
+        end = datetime.strptime(check_out_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid dates '{check_in_date}' to '{check_out_date}', expected YYYY-MM-DD")
+    if end <= start:
+        raise ValueError("Check-out date must be after check-in date")
+    return start.isoformat(), end.isoformat()
+
+def _nights(check_in_date: str, check_out_date: str) -> int:
+    return (date.fromisoformat(check_out_date) - date.fromisoformat(check_in_date)).days
+
+HOTEL_MIGRATIONS = [
+    (1, "rooms and bookings tables", (
+        '''
+        CREATE TABLE IF NOT EXISTS rooms (
+            room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_number INTEGER UNIQUE NOT NULL,
+            room_type TEXT NOT NULL,
+            price_min REAL NOT NULL,
+            price_max REAL NOT NULL,
+            is_occupied BOOLEAN DEFAULT FALSE,
+            guest_name TEXT,
+            check_in_date TEXT,
+            check_out_date TEXT,
+            special_occasion TEXT,
+            discount_percentage REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS bookings (
+            booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER,
+            guest_name TEXT NOT NULL,
+            check_in_date TEXT NOT NULL,
+            check_out_date TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            discount_amount REAL DEFAULT 0,
+            special_occasion TEXT,
+            booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (room_id) REFERENCES rooms (room_id)
+        )
+        ''',
+    )),
+    (2, "indexes for availability, room-type and guest lookups", (
+        # Availability seeks the latest booking per room by check-in date
+        "CREATE INDEX IF NOT EXISTS idx_bookings_room_stay ON bookings (room_id, check_in_date, check_out_date)",
+        # Covers the per-type room listings and the group-booking room pick
+        "CREATE INDEX IF NOT EXISTS idx_rooms_type ON rooms (room_type, room_number, price_min, price_max)",
+        "CREATE INDEX IF NOT EXISTS idx_bookings_guest ON bookings (guest_name)",
+    )),
+    (3, "discount rules table seeded with the standard occasion discounts", (
+        '''
+        CREATE TABLE IF NOT EXISTS discount_rules (
+            rule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword TEXT NOT NULL,
+            discount_percentage REAL NOT NULL,
+            room_type TEXT,
+            valid_from TEXT,
+            valid_to TEXT,
+            priority INTEGER NOT NULL DEFAULT 100
+        )
+        ''',
+        # Priorities keep the order of the original if/elif chain: when an
+        # occasion mentions several keywords, the lowest priority wins
+        '''
+        INSERT INTO discount_rules (keyword, discount_percentage, priority) VALUES
+            ('honeymoon', 15, 10),
+            ('birthday', 10, 20),
+            ('anniversary', 12, 30),
+            ('wedding', 20, 40),
+            ('special', 8, 50),
+            ('celebration', 8, 50)
+        ''',
+    )),
+]
+
+class RoomInventoryCache:
+    """In-memory room-type aggregates for tonight, keyed by lower-cased room type.
+
+    Loaded with one GROUP BY query and then kept current by write-through
+    updates from the booking methods. Entries are reloaded when the date
+    changes (tonight moves on) or after `ttl_seconds`, which bounds how long
+    bookings made by other worker processes can go unseen.
+    """
+
+    def __init__(self, db: "HotelDatabase", ttl_seconds: float = 30.0):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._by_type: Dict[str, Dict] = {}
+        self._loaded_for: Optional[str] = None
+        self._loaded_at = 0.0
+        self._writes = 0
+
+    def is_fresh(self) -> bool:
+        """True when lookups can be answered without touching SQLite"""
+        return (self._loaded_for == date.today().isoformat()
+                and time.monotonic() - self._loaded_at < self.ttl_seconds)
+
+    def refresh(self):
+        """Reload tonight's aggregates from the database"""
+        start, end = parse_stay()
+        with self._lock:
+            writes_before = self._writes
+        room_types = self.db._query_room_types(start, end)
+        with self._lock:
+            self._by_type = {rt['room_type'].lower(): rt for rt in room_types}
+            self._loaded_for = start
+            # A booking that landed while we were querying may be missing from
+            # this snapshot; serve it, but reload on the next lookup
+            self._loaded_at = time.monotonic() if self._writes == writes_before else 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+            self._writes += 1
+
+    def get(self, room_type: str) -> Optional[Dict]:
+        """Case-insensitive O(1) lookup of one room type"""
+        if not self.is_fresh():
+            self.refresh()
+        with self._lock:
+            entry = self._by_type.get(room_type.strip().lower())
+            return dict(entry) if entry else None
+
+    def all(self) -> List[Dict]:
+        if not self.is_fresh():
+            self.refresh()
+        with self._lock:
+            return [dict(entry) for entry in self._by_type.values()]
+
+    def apply_booking(self, room_type: str, check_in_date: str, check_out_date: str, rooms: int = 1):
+        """Write-through update after a committed booking"""
+        tonight = date.today().isoformat()
+        with self._lock:
+            self._writes += 1
+            entry = self._by_type.get(room_type.lower())
+            if entry is None or self._loaded_for != tonight:
+                self._loaded_at = 0.0
+                return
+            if check_in_date <= tonight < check_out_date:
+                entry['available_rooms'] = max(entry['available_rooms'] - rooms, 0)
+
+class PricingEngine:
+    """Occasion discounts driven by the discount_rules table.
+
+    Every rule keyword is compiled into one case-insensitive regex, so an
+    occasion is scanned once no matter how many rules exist. A rule applies
+    when its keyword occurs in the occasion, its room_type is NULL or matches,
+    and the stay date falls within valid_from..valid_to (either may be NULL).
+    Among applicable rules the lowest priority wins, and a room-type specific
+    rule beats a general one of the same priority. Discount lookups are
+    memoized per (room type, normalized occasion, date); bulk quotes resolve
+    the rules once per (room type, occasion) and only compare dates for
+    rules with a validity window.
+    """
+
+    MEMO_SIZE = 4096
+
+    def __init__(self, connections: ConnectionManager):
+        self.connections = connections
+        self.reload()
+
+    def reload(self):
+        """Re-read the rules table, e.g. after editing discounts"""
+        rows = self.connections.connection().execute('''
+            SELECT keyword, discount_percentage, room_type, valid_from, valid_to, priority
+            FROM discount_rules ORDER BY priority, rule_id
+        ''').fetchall()
+        rules_by_keyword: Dict[str, List[Tuple]] = {}
+        for keyword, percentage, room_type, valid_from, valid_to, priority in rows:
+            rules_by_keyword.setdefault(keyword.strip().lower(), []).append(
+                (priority, 0 if room_type else 1, percentage,
+                 room_type.strip().lower() if room_type else None, valid_from, valid_to))
+        # Longest keywords first so "special offer" wins over "special" at the same position
+        keywords = sorted(rules_by_keyword, key=len, reverse=True)
+        self._matcher = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
+        self._rules_by_keyword = rules_by_keyword
+        self._memo: Dict[Tuple[str, str, str], float] = {}
+        logger.info(f"Loaded {len(rows)} discount rules")
+
+    @staticmethod
+    def normalize_occasion(occasion: Optional[str]) -> str:
+        return " ".join(occasion.lower().split()) if occasion else ""
+
+    def discount_percentage(self, room_type: Optional[str], occasion: Optional[str],
+                            on_date: Optional[str] = None) -> float:
+        """Discount percentage for an occasion, before the price floor is applied"""
+        occasion = self.normalize_occasion(occasion)
+        if not occasion or self._matcher is None:
+            return 0.0
+        room_key = room_type.strip().lower() if room_type else ""
+        on_date = on_date or date.today().isoformat()
+        key = (room_key, occasion, on_date)
+        percentage = self._memo.get(key)
+        if percentage is None:
+            percentage = self._match(room_key, occasion, on_date)
+            if len(self._memo) >= self.MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = percentage
+        return percentage
+
+    def _candidates(self, room_key: str, occasion: str) -> List[Tuple]:
+        """Rules whose keyword occurs in the occasion and that cover the room type, best first"""
+        rules = [rule for keyword in {m.group(0) for m in self._matcher.finditer(occasion)}
+                 for rule in self._rules_by_keyword[keyword] if rule[3] is None or rule[3] == room_key]
+        return sorted(rules, key=lambda rule: rule[:2])
+
+    def _match(self, room_key: str, occasion: str, on_date: str) -> float:
+        for _, _, percentage, _, valid_from, valid_to in self._candidates(room_key, occasion):
+            if not ((valid_from and on_date < valid_from) or (valid_to and on_date > valid_to)):
+                return float(percentage)
+        return 0.0
+
+    def discount_percentages(self, room_type: Optional[str], occasion: Optional[str],
+                             on_dates: np.ndarray) -> np.ndarray:
+        """Discount percentage for each of an array of ISO dates, matching the rules once"""
+        percentages = np.zeros(len(on_dates))
+        occasion = self.normalize_occasion(occasion)
+        if not occasion or self._matcher is None:
+            return percentages
+        room_key = room_type.strip().lower() if room_type else ""
+        unset = np.ones(len(on_dates), dtype=bool)
+        for _, _, percentage, _, valid_from, valid_to in self._candidates(room_key, occasion):
+            applies = unset.copy()
+            if valid_from:
+                applies &= on_dates >= valid_from
+            if valid_to:
+                applies &= on_dates <= valid_to
+            percentages[applies] = percentage
+            unset &= ~applies
+            if not unset.any():
+                break
+        return percentages
+
+    def quote(self, room_type: str, price_min: float, price_max: float, occasion: Optional[str] = None,
+              on_date: Optional[str] = None) -> Dict:
+        """One night of a room type: list price less the occasion discount, never below price_min"""
+        discount_percentage = self.discount_percentage(room_type, occasion, on_date)
+        base_price = price_max  # Start with max price
+        discount_amount = base_price * (discount_percentage / 100)
+        final_price = base_price - discount_amount
+        
+        # Ensure final price is within bounds
+        if final_price < price_min:
+            final_price = price_min
+            discount_amount = base_price - final_price
+            discount_percentage = (discount_amount / base_price) * 100
+        
+        return {
+            'original_price': base_price,
+            'discount_percentage': discount_percentage,
+            'discount_amount': discount_amount,
+            'nightly_price': final_price
+        }
+
+    def bulk_quote(self, room_types: List[Dict], occasions: List[Optional[str]],
+                   stays: List[Tuple[str, str]], budgets: List[Optional[float]] = None) -> pd.DataFrame:
+        """Quote every room type x occasion x stay combination in one vectorized pass.
+
+        room_types are aggregate dicts as returned by get_all_room_types (an
+        'available_rooms' entry may be a per-stay list). budgets hold one total
+        budget per stay (or a single value for all stays; None means no limit).
+        Returns one row per combination, ranked with in-budget options first
+        and then by total price.
+        """
+        stays = [parse_stay(check_in, check_out) for check_in, check_out in stays]
+        occasions = list(occasions) or [None]
+        n_types, n_occasions, n_stays = len(room_types), len(occasions), len(stays)
+        if not n_types or not n_stays:
+            return pd.DataFrame()
+        if budgets is None:
+            budgets = [None]
+        if len(budgets) == 1:
+            budgets = list(budgets) * n_stays
+        if len(budgets) != n_stays:
+            raise ValueError("Pass one budget per stay, or a single budget for all stays")
+
+        price_min = np.array([rt['min_price'] for rt in room_types], dtype=float)[:, None, None]
+        price_max = np.array([rt['max_price'] for rt in room_types], dtype=float)[:, None, None]
+        nights = np.array([_nights(start, end) for start, end in stays], dtype=float)
+        budget = np.array([np.inf if b is None else b for b in budgets], dtype=float)
+        starts = np.array([start for start, _ in stays])
+        pct = np.array([[self.discount_percentages(rt['room_type'], occasion, starts) for occasion in occasions]
+                        for rt in room_types], dtype=float)
+
+        final = np.maximum(price_max * (1 - pct / 100), price_min)
+        discount = price_max - final
+        total = final * nights
+        shape = (n_types, n_occasions, n_stays)
+
+        available = np.array([np.broadcast_to(rt.get('available_rooms', 0), (n_stays,)) for rt in room_types])
+        table = pd.DataFrame({
+            'room_type': np.repeat([rt['room_type'] for rt in room_types], n_occasions * n_stays),
+            'occasion': np.tile(np.repeat(np.array(occasions, dtype=object), n_stays), n_types),
+            'check_in_date': np.tile([start for start, _ in stays], n_types * n_occasions),
+            'check_out_date': np.tile([end for _, end in stays], n_types * n_occasions),
+            'nights': np.broadcast_to(nights, shape).ravel().astype(int),
+            'original_price': np.broadcast_to(price_max, shape).ravel(),
+            'discount_percentage': (discount / price_max * 100).ravel(),
+            'discount_amount': discount.ravel(),
+            'nightly_price': final.ravel(),
+            'total_price': total.ravel(),
+            'budget': np.broadcast_to(budget, shape).ravel(),
+            'available_rooms': np.broadcast_to(available[:, None, :], shape).ravel(),
+        })
+        table['within_budget'] = table['total_price'] <= table['budget']
+        table['budget'] = table['budget'].replace(np.inf, np.nan)
+        table = table.sort_values(['within_budget', 'total_price'], ascending=[False, True], kind='stable')
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table.reset_index(drop=True)
+
 class HotelDatabase:
     def __init__(self, db_path: str = "hotel.db"):
         self.db_path = db_path
+        self.connections = ConnectionManager(db_path)
+        self.inventory = RoomInventoryCache(self)
         self.init_database()
+        self.pricing = PricingEngine(self.connections)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.connections.close_all()
     
     def init_database(self):
         """Initialize the database with tables and sample data"""
         logger.info("Initializing hotel database")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create rooms table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rooms (
-                room_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_number INTEGER UNIQUE NOT NULL,
-                room_type TEXT NOT NULL,
-                price_min REAL NOT NULL,
-                price_max REAL NOT NULL,
-                is_occupied BOOLEAN DEFAULT FALSE,
-                guest_name TEXT,
-                check_in_date TEXT,
-                check_out_date TEXT,
-                special_occasion TEXT,
-                discount_percentage REAL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create bookings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bookings (
-                booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER,
-                guest_name TEXT NOT NULL,
-                check_in_date TEXT NOT NULL,
-                check_out_date TEXT NOT NULL,
-                total_amount REAL NOT NULL,
-                discount_amount REAL DEFAULT 0,
-                special_occasion TEXT,
-                booking_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms (room_id)
-            )
-        ''')
-        
-        # Insert sample room data if table is empty
-        cursor.execute("SELECT COUNT(*) FROM rooms")
-        if cursor.fetchone()[0] == 0:
-            self._insert_sample_rooms(cursor)
-        
-        conn.commit()
-        conn.close()
+        migrated = run_migrations(self.connections.connection(), HOTEL_MIGRATIONS, "hotel database")
+        # Insert sample room data if table is empty. Every worker process
+        # starts here at once, so the count is checked again under the write lock
+        if self.connections.connection().execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 0:
+            def seed(conn):
+                if conn.execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 0:
+                    self._insert_sample_rooms(conn.cursor())
+
+            self.connections.write(seed)
+        if migrated:
+            self.analyze()
         logger.info("Database initialization completed")
     
+    def analyze(self):
+        """Refresh planner statistics, e.g. after a bulk import"""
+        analyze_database(self.connections.connection())
+    
     def _insert_sample_rooms(self, cursor):
         """Insert sample room data"""
         logger.info("Inserting sample room data")
@@ -86,24 +589,23 @@ class HotelDatabase:
         for room_type, min_price, max_price in room_types:
             for i in range(3):  # 3 rooms of each type
                 cursor.execute('''
-                    INSERT INTO rooms (room_number, room_type, price_min, price_max, is_occupied)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (room_number, room_type, min_price, max_price, False))
+                    INSERT INTO rooms (room_number, room_type, price_min, price_max)
+                    VALUES (?, ?, ?, ?)
+                ''', (room_number, room_type, min_price, max_price))
                 room_number += 1
         
         logger.info(f"Inserted {len(room_types) * 3} sample rooms")
     
-    def get_available_rooms_by_type(self, room_type: str) -> List[Dict]:
-        """Get all available rooms of a specific type"""
-        logger.info(f"Querying available {room_type} rooms")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT room_id, room_number, room_type, price_min, price_max
-            FROM rooms 
-            WHERE room_type = ? AND is_occupied = FALSE
-        ''', (room_type,))
+    @instrument("hotel.get_available_rooms_by_type")
+    def get_available_rooms_by_type(self, room_type: str, check_in_date: str = None,
+                                    check_out_date: str = None) -> List[Dict]:
+        """Get all rooms of a specific type that are free for the stay (default: tonight)"""
+        start, end = parse_stay(check_in_date, check_out_date)
+        logger.info(f"Querying available {room_type} rooms from {start} to {end}")
+        cursor = self.connections.connection().execute('''
+            SELECT r.room_id, r.room_number, r.room_type, r.price_min, r.price_max
+            FROM rooms r
+            WHERE r.room_type = ? AND ''' + ROOM_FREE_SQL, (room_type, end, start))
         
         rooms = []
         for row in cursor.fetchall():
@@ -115,25 +617,32 @@ class HotelDatabase:
                 'price_max': row[4]
             })
         
-        conn.close()
         logger.info(f"Found {len(rooms)} available {room_type} rooms")
         return rooms
     
-    def get_all_room_types(self) -> List[Dict]:
-        """Get all available room types with counts and price ranges"""
-        logger.info("Querying all room types")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT room_type, 
+    @instrument("hotel.get_all_room_types")
+    def get_all_room_types(self, check_in_date: str = None, check_out_date: str = None) -> List[Dict]:
+        """Get all room types with counts, availability for the stay (default: tonight) and price ranges"""
+        if not check_in_date and not check_out_date:
+            return self.inventory.all()
+        return self._query_room_types(*parse_stay(check_in_date, check_out_date))
+    
+    def get_room_type(self, room_type: str) -> Optional[Dict]:
+        """Get tonight's aggregates for one room type (case-insensitive), served from the inventory cache"""
+        return self.inventory.get(room_type)
+    
+    @instrument("hotel.query_room_types")
+    def _query_room_types(self, start: str, end: str) -> List[Dict]:
+        logger.info(f"Querying all room types from {start} to {end}")
+        cursor = self.connections.connection().execute('''
+            SELECT r.room_type, 
                    COUNT(*) as total_rooms,
-                   SUM(CASE WHEN is_occupied = FALSE THEN 1 ELSE 0 END) as available_rooms,
-                   MIN(price_min) as min_price,
-                   MAX(price_max) as max_price
-            FROM rooms 
-            GROUP BY room_type
-        ''')
+                   SUM(CASE WHEN ''' + ROOM_FREE_SQL + ''' THEN 1 ELSE 0 END) as available_rooms,
+                   MIN(r.price_min) as min_price,
+                   MAX(r.price_max) as max_price
+            FROM rooms r
+            GROUP BY r.room_type
+        ''', (end, start))
         
         room_types = []
         for row in cursor.fetchall():
@@ -145,107 +654,225 @@ class HotelDatabase:
                 'max_price': row[4]
             })
         
-        conn.close()
         logger.info(f"Found {len(room_types)} room types")
         return room_types
     
+    @instrument("hotel.book_room")
     def book_room(self, room_id: int, guest_name: str, check_in_date: str, 
                   check_out_date: str, special_occasion: str = None) -> Tuple[bool, str, float]:
-        """Book a room and return success status, message, and final price"""
+        """Book a room for [check_in_date, check_out_date) and return success status, message, and total price"""
         logger.info(f"Attempting to book room {room_id} for {guest_name}")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            check_in_date, check_out_date = parse_stay(check_in_date, check_out_date)
+        except ValueError as e:
+            return False, str(e), 0
+        
+        room_data = self.connections.connection().execute('''
+            SELECT room_type, price_min, price_max FROM rooms WHERE room_id = ?
+        ''', (room_id,)).fetchone()
+        if not room_data:
+            return False, "Room not found", 0
+        
+        room_type, price_min, price_max = room_data
+        nightly_price, nightly_discount, _ = self._quote_price(
+            room_type, price_min, price_max, special_occasion, check_in_date)
+        nights = _nights(check_in_date, check_out_date)
+        total_price, discount_amount = nightly_price * nights, nightly_discount * nights
+        
+        def claim(conn):
+            # The availability check and the insert are one statement, so a
+            # concurrent booking can never slip in between them
+            cursor = conn.execute(CLAIM_ROOM_SQL, (
+                guest_name, check_in_date, check_out_date, total_price, discount_amount,
+                special_occasion, room_id, check_out_date, check_in_date))
+            return cursor.rowcount > 0
         
         try:
-            # Check if room is available
-            cursor.execute('''
-                SELECT room_type, price_min, price_max, is_occupied
-                FROM rooms WHERE room_id = ?
-            ''', (room_id,))
-            
-            room_data = cursor.fetchone()
-            if not room_data:
-                return False, "Room not found", 0
-            
-            room_type, price_min, price_max, is_occupied = room_data
-            
-            if is_occupied:
-                return False, "Room is already occupied", 0
-            
-            # Calculate discount based on special occasion
-            discount_percentage = self._calculate_discount(special_occasion)
-            base_price = price_max  # Start with max price
-            discount_amount = base_price * (discount_percentage / 100)
-            final_price = base_price - discount_amount
-            
-            # Ensure final price is within bounds
-            if final_price < price_min:
-                final_price = price_min
-                discount_amount = base_price - final_price
-                discount_percentage = (discount_amount / base_price) * 100
-            
-            # Update room status
-            cursor.execute('''
-                UPDATE rooms 
-                SET is_occupied = TRUE, 
-                    guest_name = ?, 
-                    check_in_date = ?, 
-                    check_out_date = ?,
-                    special_occasion = ?,
-                    discount_percentage = ?
-                WHERE room_id = ?
-            ''', (guest_name, check_in_date, check_out_date, special_occasion, discount_percentage, room_id))
-            
-            # Create booking record
-            cursor.execute('''
-                INSERT INTO bookings (room_id, guest_name, check_in_date, check_out_date, 
-                                    total_amount, discount_amount, special_occasion)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (room_id, guest_name, check_in_date, check_out_date, final_price, discount_amount, special_occasion))
-            
-            conn.commit()
-            logger.info(f"Successfully booked room {room_id} for {guest_name} at ${final_price:.2f}")
-            
-            return True, f"Room {room_id} booked successfully! Final price: ${final_price:.2f}", final_price
-            
+            claimed = self.connections.write(claim)
         except Exception as e:
-            conn.rollback()
             logger.error(f"Error booking room: {str(e)}")
             return False, f"Error booking room: {str(e)}", 0
-        finally:
-            conn.close()
+        
+        if not claimed:
+            return False, f"Room is already booked between {check_in_date} and {check_out_date}", 0
+        
+        self.inventory.apply_booking(room_type, check_in_date, check_out_date)
+        logger.info(f"Successfully booked room {room_id} for {guest_name} at ${total_price:.2f}")
+        
+        return True, (f"Room {room_id} booked successfully for {nights} night(s) at ${nightly_price:.2f} per night! "
+                      f"Total price: ${total_price:.2f}"), total_price
     
-    def _calculate_discount(self, special_occasion: str) -> float:
-        """Calculate discount percentage based on special occasion"""
-        if not special_occasion:
-            return 0
+    @instrument("hotel.book_rooms")
+    def book_rooms(self, guest_name: str, check_in_date: str, check_out_date: str,
+                   room_ids: List[int] = None, room_type: str = None, count: int = 1,
+                   special_occasion: str = None) -> Tuple[bool, str, List[Dict], float]:
+        """Book several rooms in one all-or-nothing transaction.
+        
+        Either pass explicit room_ids, or a room_type and how many rooms of it
+        are needed. Returns success status, message, the booked rooms with
+        their nightly and stay prices, and the total price of the stay.
+        """
+        logger.info(f"Attempting group booking for {guest_name}: ids={room_ids}, type={room_type}, count={count}")
+        try:
+            check_in_date, check_out_date = parse_stay(check_in_date, check_out_date)
+        except ValueError as e:
+            return False, str(e), [], 0
+        nights = _nights(check_in_date, check_out_date)
+        if room_ids:
+            if len(set(room_ids)) != len(room_ids):
+                return False, "The same room was requested more than once", [], 0
+        elif room_type:
+            if count < 1:
+                return False, "At least one room must be requested", [], 0
+            rt = self.get_room_type(room_type)
+            if not rt:
+                return False, f"Room type '{room_type}' not found", [], 0
+            room_type = rt['room_type']
+        else:
+            return False, "Specify either room IDs or a room type", [], 0
+        
+        def claim(conn):
+            if room_ids:
+                placeholders = ", ".join("?" * len(room_ids))
+                rows = conn.execute(f'''
+                    SELECT room_id, room_number, room_type, price_min, price_max
+                    FROM rooms WHERE room_id IN ({placeholders})
+                ''', room_ids).fetchall()
+                found = {row[0] for row in rows}
+                missing = [room_id for room_id in room_ids if room_id not in found]
+                if missing:
+                    raise _BookingRejected(f"Rooms not found: {missing}")
+            else:
+                # The write lock is already held, so rooms picked here stay free until commit
+                rows = conn.execute('''
+                    SELECT r.room_id, r.room_number, r.room_type, r.price_min, r.price_max
+                    FROM rooms r
+                    WHERE r.room_type = ? AND ''' + ROOM_FREE_SQL + '''
+                    ORDER BY r.room_number LIMIT ?
+                ''', (room_type, check_out_date, check_in_date, count)).fetchall()
+                if len(rows) < count:
+                    raise _BookingRejected(f"Only {len(rows)} {room_type} rooms are free between "
+                                           f"{check_in_date} and {check_out_date}")
+            
+            # One pricing pass; every room of a type gets the same quote
+            quotes = {}
+            booked = []
+            for rid, room_number, rtype, price_min, price_max in rows:
+                if rtype not in quotes:
+                    quotes[rtype] = self._quote_price(rtype, price_min, price_max, special_occasion, check_in_date)
+                nightly_price, nightly_discount, discount_percentage = quotes[rtype]
+                booked.append({
+                    'room_id': rid,
+                    'room_number': room_number,
+                    'room_type': rtype,
+                    'nightly_price': nightly_price,
+                    'total_price': nightly_price * nights,
+                    'discount_amount': nightly_discount * nights,
+                    'discount_percentage': discount_percentage
+                })
+            
+            taken = []
+            for b in booked:
+                cursor = conn.execute(CLAIM_ROOM_SQL, (
+                    guest_name, check_in_date, check_out_date, b['total_price'], b['discount_amount'],
+                    special_occasion, b['room_id'], check_out_date, check_in_date))
+                if cursor.rowcount == 0:
+                    taken.append(b['room_id'])
+            if taken:
+                raise _BookingRejected(f"Rooms already booked between {check_in_date} and {check_out_date}: {taken}")
+            return booked
         
-        occasion_lower = special_occasion.lower()
-        if 'honeymoon' in occasion_lower:
-            return 15.0
-        elif 'birthday' in occasion_lower:
-            return 10.0
-        elif 'anniversary' in occasion_lower:
-            return 12.0
-        elif 'wedding' in occasion_lower:
-            return 20.0
-        elif 'special' in occasion_lower or 'celebration' in occasion_lower:
-            return 8.0
+        try:
+            booked = self.connections.write(claim)
+        except _BookingRejected as e:
+            return False, str(e), [], 0
+        except Exception as e:
+            logger.error(f"Error booking rooms: {str(e)}")
+            return False, f"Error booking rooms: {str(e)}", [], 0
+        
+        for rtype in {b['room_type'] for b in booked}:
+            self.inventory.apply_booking(rtype, check_in_date, check_out_date,
+                                         rooms=sum(1 for b in booked if b['room_type'] == rtype))
+        total_price = sum(b['total_price'] for b in booked)
+        logger.info(f"Successfully booked {len(booked)} rooms for {guest_name} at ${total_price:.2f}")
         
-        return 0
+        room_list = ", ".join(str(b['room_id']) for b in booked)
+        return True, f"Rooms {room_list} booked successfully! Total price: ${total_price:.2f}", booked, total_price
     
+    def _quote_price(self, room_type: str, price_min: float, price_max: float,
+                     special_occasion: str = None, on_date: str = None) -> Tuple[float, float, float]:
+        """Return nightly price, discount amount and effective discount percentage for one night"""
+        quote = self.pricing.quote(room_type, price_min, price_max, special_occasion, on_date)
+        return quote['nightly_price'], quote['discount_amount'], quote['discount_percentage']
+    
+    @instrument("hotel.bulk_quote")
+    def bulk_quote(self, stays: List[Tuple[str, str]], occasions: List[Optional[str]] = None,
+                   room_types: List[str] = None, budgets: List[Optional[float]] = None,
+                   available_only: bool = False) -> pd.DataFrame:
+        """Ranked quotes for room types x occasions x stays, with availability per stay.
+        
+        room_types defaults to every type in the hotel. See PricingEngine.bulk_quote.
+        """
+        stays = [parse_stay(check_in, check_out) for check_in, check_out in stays]
+        by_type: Dict[str, Dict] = {}
+        if stays:
+            # One grouped query covers every stay
+            cursor = self.connections.connection().execute('''
+                WITH stays (stay, check_in, check_out) AS (VALUES ''' + ", ".join(["(?, ?, ?)"] * len(stays)) + ''')
+                SELECT s.stay, r.room_type,
+                       COUNT(*) as total_rooms,
+                       SUM(CASE WHEN ''' + ROOM_FREE_TEMPLATE.format(end='s.check_out', start='s.check_in') + '''
+                           THEN 1 ELSE 0 END) as available_rooms,
+                       MIN(r.price_min) as min_price,
+                       MAX(r.price_max) as max_price
+                FROM stays s CROSS JOIN rooms r
+                GROUP BY s.stay, r.room_type
+            ''', [value for i, (start, end) in enumerate(stays) for value in (i, start, end)])
+            for stay, room_type, total_rooms, available_rooms, min_price, max_price in cursor.fetchall():
+                entry = by_type.setdefault(room_type.lower(), {
+                    'room_type': room_type, 'total_rooms': total_rooms, 'available_rooms': [0] * len(stays),
+                    'min_price': min_price, 'max_price': max_price})
+                entry['available_rooms'][stay] = available_rooms
+        if room_types:
+            wanted = [by_type.get(room_type.strip().lower()) for room_type in room_types]
+            selected = [rt for rt in wanted if rt]
+        else:
+            selected = list(by_type.values())
+        table = self.pricing.bulk_quote(selected, occasions or [None], stays, budgets)
+        if available_only and not table.empty:
+            table = table[table['available_rooms'] > 0].reset_index(drop=True)
+            table['rank'] = np.arange(1, len(table) + 1)
+        return table
+    
+    @instrument("hotel.quote_room_type")
+    def quote_room_type(self, room_type: str, special_occasion: str = None,
+                        on_date: str = None) -> Optional[Dict]:
+        """Quote one night of a room type for an occasion, exactly as a booking would be priced"""
+        rt = self.get_room_type(room_type)
+        if not rt:
+            return None
+        quote = self.pricing.quote(rt['room_type'], rt['min_price'], rt['max_price'], special_occasion, on_date)
+        quote['room_type'] = rt['room_type']
+        return quote
+    
+    @instrument("hotel.export_to_excel")
     def export_to_excel(self, filename: str = "hotel_bookings.xlsx"):
         """Export all booking data to Excel file"""
         logger.info(f"Exporting data to {filename}")
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connections.connection()
         
-        # Export rooms data
+        # Export rooms data, with occupancy from the booking covering today
+        today = date.today().isoformat()
         rooms_df = pd.read_sql_query('''
-            SELECT room_number, room_type, price_min, price_max, is_occupied, 
-                   guest_name, check_in_date, check_out_date, special_occasion, 
-                   discount_percentage, created_at
-            FROM rooms
-        ''', conn)
+            SELECT r.room_number, r.room_type, r.price_min, r.price_max,
+                   b.booking_id IS NOT NULL AS is_occupied,
+                   b.guest_name, b.check_in_date, b.check_out_date, b.special_occasion,
+                   COALESCE(100.0 * b.discount_amount / NULLIF(b.total_amount + b.discount_amount, 0), 0)
+                       AS discount_percentage,
+                   r.created_at
+            FROM rooms r''' + CURRENT_STAY_JOIN_SQL + '''
+            ORDER BY r.room_number
+        ''', conn, params=(today, today))
         
         # Export bookings data
         bookings_df = pd.read_sql_query('''
@@ -256,102 +883,1152 @@ class HotelDatabase:
             JOIN rooms r ON b.room_id = r.room_id
         ''', conn)
         
-        conn.close()
         
-        # Write to Excel with multiple sheets
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            rooms_df.to_excel(writer, sheet_name='Rooms', index=False)
-            bookings_df.to_excel(writer, sheet_name='Bookings', index=False)
+        # Write to a temp file next to the target and swap it in, so readers
+        # never open a half-written workbook
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix=".xlsx",
+                                        dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(fd)
+        try:
+            with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+                rooms_df.to_excel(writer, sheet_name='Rooms', index=False)
+                bookings_df.to_excel(writer, sheet_name='Bookings', index=False)
+            os.replace(tmp_path, filename)
+        except Exception:
+            os.remove(tmp_path)
+            raise
         
         logger.info(f"Data exported successfully to {filename}")
     
+    @instrument("hotel.get_room_status")
     def get_room_status(self, room_id: int) -> Optional[Dict]:
-        """Get current status of a specific room"""
+        """Get current status of a specific room, derived from the booking covering today"""
         logger.info(f"Querying status for room {room_id}")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT room_id, room_number, room_type, price_min, price_max, 
-                   is_occupied, guest_name, check_in_date, check_out_date, 
-                   special_occasion, discount_percentage
-            FROM rooms WHERE room_id = ?
-        ''', (room_id,))
+        today = date.today().isoformat()
+        cursor = self.connections.connection().execute('''
+            SELECT r.room_id, r.room_number, r.room_type, r.price_min, r.price_max, 
+                   b.booking_id, b.guest_name, b.check_in_date, b.check_out_date, 
+                   b.special_occasion, b.total_amount, b.discount_amount
+            FROM rooms r''' + CURRENT_STAY_JOIN_SQL + '''
+            WHERE r.room_id = ?
+        ''', (today, today, room_id))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
+            total_amount, discount_amount = row[10] or 0, row[11] or 0
+            list_price = total_amount + discount_amount
             return {
                 'room_id': row[0],
                 'room_number': row[1],
                 'room_type': row[2],
                 'price_min': row[3],
                 'price_max': row[4],
-                'is_occupied': bool(row[5]),
+                'is_occupied': row[5] is not None,
                 'guest_name': row[6],
                 'check_in_date': row[7],
                 'check_out_date': row[8],
                 'special_occasion': row[9],
-                'discount_percentage': row[10]
+                'discount_percentage': (discount_amount / list_price * 100) if list_price else 0
             }
         
         return None 
+
+
+class AsyncHotelDatabase:
+    """Awaitable facade over HotelDatabase for use from the agent's event loop.
+
+    Every call runs on a small dedicated thread pool, so SQLite queries and the
+    Excel export never block audio processing. The pool is bounded: extra calls
+    queue up instead of spawning threads, and each worker thread reuses its own
+    pooled connection.
+    """
+
+    def __init__(self, db: HotelDatabase, max_workers: int = 4):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hotel-db")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_available_rooms_by_type(self, room_type: str, check_in_date: str = None,
+                                          check_out_date: str = None) -> List[Dict]:
+        return await self._run(self.db.get_available_rooms_by_type, room_type, check_in_date, check_out_date)
+
+    async def get_all_room_types(self, check_in_date: str = None, check_out_date: str = None) -> List[Dict]:
+        if not check_in_date and not check_out_date and self.db.inventory.is_fresh():
+            return self.db.get_all_room_types()
+        return await self._run(self.db.get_all_room_types, check_in_date, check_out_date)
+
+    async def get_room_type(self, room_type: str) -> Optional[Dict]:
+        if self.db.inventory.is_fresh():
+            return self.db.get_room_type(room_type)
+        return await self._run(self.db.get_room_type, room_type)
+
+    async def book_room(self, room_id: int, guest_name: str, check_in_date: str,
+                        check_out_date: str, special_occasion: str = None) -> Tuple[bool, str, float]:
+        return await self._run(self.db.book_room, room_id, guest_name, check_in_date,
+                               check_out_date, special_occasion)
+
+    async def book_rooms(self, guest_name: str, check_in_date: str, check_out_date: str,
+                         room_ids: List[int] = None, room_type: str = None, count: int = 1,
+                         special_occasion: str = None) -> Tuple[bool, str, List[Dict], float]:
+        return await self._run(self.db.book_rooms, guest_name, check_in_date, check_out_date,
+                               room_ids, room_type, count, special_occasion)
+
+    async def bulk_quote(self, stays: List[Tuple[str, str]], occasions: List[Optional[str]] = None,
+                         room_types: List[str] = None, budgets: List[Optional[float]] = None,
+                         available_only: bool = False) -> pd.DataFrame:
+        return await self._run(self.db.bulk_quote, stays, occasions, room_types, budgets, available_only)
+
+    async def quote_room_type(self, room_type: str, special_occasion: str = None,
+                              on_date: str = None) -> Optional[Dict]:
+        if self.db.inventory.is_fresh():
+            return self.db.quote_room_type(room_type, special_occasion, on_date)
+        return await self._run(self.db.quote_room_type, room_type, special_occasion, on_date)
+
+    async def get_room_status(self, room_id: int) -> Optional[Dict]:
+        return await self._run(self.db.get_room_status, room_id)
+
+    async def export_to_excel(self, filename: str = "hotel_bookings.xlsx"):
+        return await self._run(self.db.export_to_excel, filename)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads and close their connections"""
+        self.executor.shutdown(wait=wait)
+        self.db.close()
+
+
+class ExcelExportWorker:
+    """Keeps the Excel export up to date from a background thread.
+
+    request_export() only marks the export as stale. The worker waits until no
+    new request has arrived for `debounce_seconds` (but never longer than
+    `max_delay_seconds` after the first one), then writes a single export
+    covering the whole burst.
+    """
+
+    def __init__(self, db: HotelDatabase, filename: str = "hotel_bookings.xlsx",
+                 debounce_seconds: float = 2.0, max_delay_seconds: float = 30.0):
+        self.db = db
+        self.filename = filename
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.last_exported_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.exports_written = 0
+        self.requests_coalesced = 0
+        self._cond = threading.Condition()
+        self._first_request: Optional[float] = None
+        self._last_request: Optional[float] = None
+        self._stopping = False
+        self._flush_on_stop = True
+        self._thread = threading.Thread(target=self._run, name="excel-export", daemon=True)
+        self._thread.start()
+
+    def request_export(self):
+        """Mark the export as stale; returns immediately"""
+        now = time.monotonic()
+        with self._cond:
+            if self._first_request is None:
+                self._first_request = now
+            else:
+                self.requests_coalesced += 1
+            self._last_request = now
+            self._cond.notify()
+
+    def status(self) -> Dict:
+        """Report when the export file was last written and whether one is pending"""
+        with self._cond:
+            pending = self._first_request is not None
+        return {
+            'filename': self.filename,
+            'last_exported_at': self.last_exported_at.isoformat(timespec='seconds') if self.last_exported_at else None,
+            'export_pending': pending,
+            'exports_written': self.exports_written,
+            'requests_coalesced': self.requests_coalesced,
+            'last_error': self.last_error
+        }
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = None):
+        """Stop the worker, writing any pending export first when flush is True"""
+        with self._cond:
+            self._stopping = True
+            self._flush_on_stop = flush
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._first_request is None and not self._stopping:
+                    self._cond.wait()
+                if self._first_request is None or (self._stopping and not self._flush_on_stop):
+                    return
+                # Let the burst settle before writing
+                while not self._stopping:
+                    deadline = min(self._last_request + self.debounce_seconds,
+                                   self._first_request + self.max_delay_seconds)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._first_request = self._last_request = None
+            try:
+                self.db.export_to_excel(self.filename)
+                self.last_exported_at = datetime.now()
+                self.last_error = None
+                self.exports_written += 1
+            except Exception as e:
+                logger.error(f"Background Excel export failed: {e}")
+                self.last_error = str(e)
+
     
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Embedding BLOB layout: magic, dimension, model-id length, the UTF-8 model id
+# padded to a 4-byte boundary, then `dimension` little-endian float32 values.
+# The header lets a search skip vectors written by a different model.
+EMBEDDING_MAGIC = b'F32E'
+_EMBEDDING_HEADER = struct.Struct('<4sHH')
+
+_embedding_models: Dict[str, object] = {}
+_embedding_models_lock = threading.Lock()
+
+def get_embedding_model(name: str = EMBEDDING_MODEL_NAME):
+    """Return the process-wide SentenceTransformer for `name`, loading it on first use.
+
+    Loading takes seconds and hundreds of MB, so every MeetingDatabase (and
+    every job in a worker process) shares one instance. Thread-safe: callers
+    racing on the first use wait for a single load.
+    """
+    model = _embedding_models.get(name)
+    if model is None:
+        with _embedding_models_lock:
+            model = _embedding_models.get(name)
+            if model is None:
+                # Imported here so the hotel side never pays for torch
+                from sentence_transformers import SentenceTransformer
+                started = time.perf_counter()
+                model = SentenceTransformer(name)
+                _embedding_models[name] = model
+                logger.info(f"Loaded embedding model '{name}' in {time.perf_counter() - started:.1f}s")
+    return model
+
+def set_embedding_model(model, name: str = EMBEDDING_MODEL_NAME):
+    """Register an already constructed model under `name` (e.g. a stub for offline benchmarks)"""
+    with _embedding_models_lock:
+        _embedding_models[name] = model
+    with _chunk_tokenizer_lock:
+        _chunk_tokenizers.pop(name, None)
+
+def prewarm_embedding_model(name: str = EMBEDDING_MODEL_NAME):
+    """Load the model and run one encode so the first real query pays neither cost"""
+    get_embedding_model(name).encode("warm up")
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode requests into batched model calls.
+
+    Callers get a Future per text. A background thread takes every waiting
+    request (up to `max_batch_size`), runs one batched encode, and resolves
+    every future. A lone request goes straight to the model. Requests that
+    arrive while an encode is running queue up behind it, and only then does
+    the next batch stay open for up to `max_wait_ms` (counted from its oldest
+    request) to fill up, so bursts from many sessions share a forward pass.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+        self._backlogged = False
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    def stats(self) -> Dict:
+        """Batch fill and queue delay since startup"""
+        with self._stats_lock:
+            batches, items = self._batches, self._items
+            return {
+                'batches': batches,
+                'items': items,
+                'avg_batch_size': items / batches if batches else 0,
+                'avg_batch_fill': items / (batches * self.max_batch_size) if batches else 0,
+                'avg_queue_delay_ms': self._queue_delay_total / items * 1000 if items else 0,
+                'max_queue_delay_ms': self._queue_delay_max * 1000,
+                'queued': self._queue.qsize()
+            }
+
+    def _collect(self) -> List[Tuple[str, Future, float]]:
+        batch = [self._queue.get()]
+        # Linger for more only while requests are piling up behind the model
+        deadline = batch[0][2] + self.max_wait_ms / 1000 if self._backlogged else 0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                vectors = get_embedding_model(self.model_name).encode(
+                    [text for text, _, _ in batch], batch_size=len(batch))
+            except Exception as e:
+                self._backlogged = not self._queue.empty()
+                REGISTRY.observe("embedding.encode_batch", time.perf_counter() - started, error=True)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            REGISTRY.observe("embedding.encode_batch", time.perf_counter() - started)
+            self._backlogged = not self._queue.empty()
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            delays = [started - enqueued for _, _, enqueued in batch]
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._queue_delay_total += sum(delays)
+                self._queue_delay_max = max(self._queue_delay_max, max(delays))
+
+_embedding_batchers: Dict[str, EmbeddingBatcher] = {}
+
+def get_embedding_batcher(name: str = EMBEDDING_MODEL_NAME, max_batch_size: Optional[int] = None,
+                          max_wait_ms: Optional[float] = None) -> EmbeddingBatcher:
+    """Return the process-wide batcher for `name`, creating it on first use.
+
+    Settings not passed come from EMBEDDING_BATCH_SIZE / EMBEDDING_BATCH_WAIT_MS
+    or the EmbeddingBatcher defaults. Settings passed for an existing batcher
+    replace its current ones.
+    """
+    with _embedding_models_lock:
+        batcher = _embedding_batchers.get(name)
+        if batcher is None:
+            batcher = _embedding_batchers[name] = EmbeddingBatcher(
+                name,
+                max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 32)),
+                max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5.0)),
+            )
+        if max_batch_size is not None:
+            batcher.max_batch_size = max_batch_size
+        if max_wait_ms is not None:
+            batcher.max_wait_ms = max_wait_ms
+        return batcher
+
+def encode_embedding(vector, model_id: str = EMBEDDING_MODEL_NAME) -> bytes:
+    """Serialize an embedding as raw float32 bytes with a small header"""
+    values = np.asarray(vector, dtype='<f4').ravel()
+    model = model_id.encode('utf-8')
+    padding = b'\0' * (-len(model) % 4)
+    return _EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, values.size, len(model)) + model + padding + values.tobytes()
+
+def decode_embedding(blob: bytes) -> Tuple[np.ndarray, str]:
+    """Return (vector, model id) for an encoded embedding.
+
+    The vector is a read-only view onto the BLOB; nothing is copied.
+    """
+    magic, dim, model_len = _EMBEDDING_HEADER.unpack_from(blob)
+    if magic != EMBEDDING_MAGIC:
+        raise ValueError("Not an encoded float32 embedding")
+    offset = _EMBEDDING_HEADER.size + model_len + (-model_len % 4)
+    model_id = bytes(blob[_EMBEDDING_HEADER.size:_EMBEDDING_HEADER.size + model_len]).decode('utf-8')
+    return np.frombuffer(blob, dtype='<f4', count=dim, offset=offset), model_id
+
+# Passages are windows of model tokens with some overlap, so a sentence cut at
+# one boundary is whole in the next window. all-MiniLM-L6-v2 truncates its
+# input at 256 word pieces; 200 leaves room for the special tokens.
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+_WORD_RE = re.compile(r'\S+')
+
+_chunk_tokenizers: Dict[str, object] = {}
+_chunk_tokenizer_lock = threading.Lock()
+
+def _chunk_tokenizer(model_name: str):
+    """A private copy of the model's fast tokenizer for chunking, or None if it has none.
+
+    encode() on the batcher thread switches truncation and padding on the
+    model's own tokenizer; calling that Rust tokenizer from another thread at
+    the same time fails with "Already borrowed". The copy is loaded from the
+    model's files, never touching the shared instance, and is only used under
+    _chunk_tokenizer_lock.
+    """
+    if model_name not in _chunk_tokenizers:
+        shared = getattr(get_embedding_model(model_name), 'tokenizer', None)
+        tokenizer = None
+        if getattr(shared, 'is_fast', False):
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(shared.name_or_path, use_fast=True)
+            except Exception as e:
+                logger.warning(f"Could not load a chunking tokenizer for '{model_name}', chunking by words: {e}")
+        _chunk_tokenizers[model_name] = tokenizer
+    return _chunk_tokenizers[model_name]
+
+def _token_spans(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> List[Tuple[int, int]]:
+    """Character (start, end) of each model token, or of each word without a fast tokenizer"""
+    with _chunk_tokenizer_lock:
+        tokenizer = _chunk_tokenizer(model_name)
+        if tokenizer is not None:
+            encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+            return [tuple(span) for span in encoded['offset_mapping']]
+    return [m.span() for m in _WORD_RE.finditer(text)]
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP,
+               model_name: str = EMBEDDING_MODEL_NAME) -> List[Tuple[int, int]]:
+    """Split text into overlapping windows of at most max_tokens tokens.
+
+    Returns (start, end) character offsets into `text`; every window is short
+    enough for the model to embed without truncation.
+    """
+    spans = _token_spans(text, model_name)
+    step = max(1, max_tokens - overlap)
+    chunks = []
+    for first in range(0, len(spans), step):
+        last = min(first + max_tokens, len(spans)) - 1
+        chunks.append((spans[first][0], spans[last][1]))
+        if last == len(spans) - 1:
+            break
+    return chunks
+
+def _convert_pickled_embeddings(conn: sqlite3.Connection):
+    """Rewrite legacy pickled ndarray embeddings in the float32 format.
+
+    This is the only place pickle is still loaded, once, from our own database.
+    """
+    rows = conn.execute("SELECT file_id, embedding FROM meeting_files").fetchall()
+    converted = [(encode_embedding(pickle.loads(blob)), file_id)
+                 for file_id, blob in rows if not bytes(blob[:4]) == EMBEDDING_MAGIC]
+    conn.executemany("UPDATE meeting_files SET embedding = ? WHERE file_id = ?", converted)
+    logger.info(f"Converted {len(converted)} pickled embeddings to float32")
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _backfill_content_hashes(conn: sqlite3.Connection):
+    rows = conn.execute("SELECT file_id, content FROM meeting_files").fetchall()
+    conn.executemany("UPDATE meeting_files SET content_hash = ? WHERE file_id = ?",
+                     [(_content_hash(content), file_id) for file_id, content in rows])
+
+MEETING_MIGRATIONS = [
+    (1, "meeting_files table", (
+        '''
+        CREATE TABLE IF NOT EXISTS meeting_files (
+            file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT UNIQUE NOT NULL,
+            content TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    (2, "index meeting files by creation time", (
+        "CREATE INDEX IF NOT EXISTS idx_meeting_files_created_at ON meeting_files (created_at)",
+    )),
+    (3, "store embeddings as raw float32 instead of pickle", (
+        _convert_pickled_embeddings,
+    )),
+    # Existing files are chunked on the next start (see MeetingDatabase._backfill_chunks),
+    # since that needs the embedding model
+    (4, "meeting_chunks table for passage embeddings", (
+        '''
+        CREATE TABLE IF NOT EXISTS meeting_chunks (
+            chunk_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id INTEGER NOT NULL REFERENCES meeting_files (file_id) ON DELETE CASCADE,
+            chunk_index INTEGER NOT NULL,
+            start_offset INTEGER NOT NULL,
+            end_offset INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            UNIQUE (file_id, chunk_index)
+        )
+        ''',
+    )),
+    (5, "source file hash for skip-if-unchanged ingestion", (
+        "ALTER TABLE meeting_files ADD COLUMN source_hash TEXT",
+    )),
+    (6, "content hash so identical documents share embeddings", (
+        "ALTER TABLE meeting_files ADD COLUMN content_hash TEXT",
+        _backfill_content_hashes,
+        "CREATE INDEX IF NOT EXISTS idx_meeting_files_content_hash ON meeting_files (content_hash)",
+    )),
+    # External-content FTS5 index: the text lives only in meeting_files and the
+    # triggers keep the inverted index in step with every write
+    (7, "meeting_fts full-text index for keyword and hybrid search", (
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS meeting_fts USING fts5(
+            content, content='meeting_files', content_rowid='file_id', tokenize='porter unicode61'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS meeting_files_fts_insert AFTER INSERT ON meeting_files BEGIN
+            INSERT INTO meeting_fts (rowid, content) VALUES (new.file_id, new.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS meeting_files_fts_delete AFTER DELETE ON meeting_files BEGIN
+            INSERT INTO meeting_fts (meeting_fts, rowid, content) VALUES ('delete', old.file_id, old.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS meeting_files_fts_update AFTER UPDATE OF content ON meeting_files BEGIN
+            INSERT INTO meeting_fts (meeting_fts, rowid, content) VALUES ('delete', old.file_id, old.content);
+            INSERT INTO meeting_fts (rowid, content) VALUES (new.file_id, new.content);
+        END
+        ''',
+        "INSERT INTO meeting_fts (meeting_fts) VALUES ('rebuild')",
+    )),
+    # Per-term document counts straight from the FTS index
+    (8, "meeting_fts_vocab for keyword document frequencies", (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS meeting_fts_vocab USING fts5vocab(meeting_fts, 'row')",
+    )),
+]
+
+# Hybrid search: how many candidates each ranking contributes, and the
+# reciprocal rank fusion constant (60 is the usual choice from the RRF paper).
+# The keyword matches prefilter the dense scoring unless there are fewer than
+# HYBRID_MIN_LEXICAL per requested result, in which case the whole index is scanned.
+HYBRID_CANDIDATES = 50
+HYBRID_MIN_LEXICAL = 2
+RRF_K = 60
+# How long per-term document counts are reused before being read again
+TERM_COUNTS_TTL = 60
+# Left out of the keyword query, like any term found in more than
+# COMMON_TERM_FRACTION of the files: they match nearly every transcript, so
+# BM25 would score the whole table to return an arbitrary "top" list
+COMMON_TERM_FRACTION = 0.25
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before being below
+    between both but by can could did do does doing down during each few for from further had has have
+    having he her here hers him his how i if in into is it its itself just me more most my no nor not now
+    of off on once only or other our ours out over own same she should so some such than that the their
+    theirs them then there these they this those through to too under until up very was we were what when
+    where which while who whom why will with would you your yours
+""".split())
+
+# Search results carry a short snippet; transcripts are read a page at a time
+SNIPPET_CHARS = 200
+READ_PAGE_CHARS = 2000
+
+def _term_key(word: str) -> str:
+    word = word.lower()
+    return word[:-1] if len(word) > 3 and word.endswith('s') else word
+
+def make_snippet(text: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """The width-character window of text holding the most query terms, cut at word boundaries"""
+    text = " ".join(text.split())
+    if len(text) <= width:
+        return text
+    terms = {_term_key(term) for term in re.findall(r'\w+', query) if len(term) > 2}
+    hits = [m.start() for m in re.finditer(r'\w+', text) if _term_key(m.group()) in terms]
+    start, most, last = 0, 0, 0
+    for first, position in enumerate(hits):
+        while last < len(hits) and hits[last] < position + width:
+            last += 1
+        if last - first > most:
+            # Lead in with a little context before the first matching term
+            start, most = max(0, position - width // 5), last - first
+    start = min(start, len(text) - width)
+    if start > 0:
+        start = text.find(' ', start) + 1 or start
+    end = start + width
+    if end < len(text):
+        cut = text.rfind(' ', start, end)
+        end = cut if cut > start else end
+    return ("…" if start > 0 else "") + text[start:end].strip() + ("…" if end < len(text) else "")
+
+def _hash_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _extract_pdf_text(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (text, error) for one PDF; runs in an ingestion worker process"""
+    try:
+        with pdfplumber.open(path) as pdf:
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages).strip()
+        return (text, None) if text else (None, "no text extracted")
+    except Exception as e:
+        return None, str(e)
+
+def _pdf_sources(source: str) -> List[Tuple[str, str]]:
+    """(path, stored filename) for every PDF under a directory, or matching a glob.
+
+    Files under a directory are named by their path relative to it, so
+    same-named PDFs in different subfolders do not replace each other.
+    """
+    if os.path.isdir(source):
+        found = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith('.pdf'):
+                    path = os.path.join(root, name)
+                    found.append((path, os.path.relpath(path, source)))
+        return sorted(found)
+    return sorted((path, os.path.basename(path)) for path in glob.glob(source, recursive=True)
+                  if os.path.isfile(path))
+
+def _sort_ids(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(sorted ids, row position of each) for looking rows up by id"""
+    order = np.argsort(ids, kind='stable')
+    return ids[order], order
+
+def _find_rows(sorted_ids: np.ndarray, order: np.ndarray, wanted) -> Tuple[np.ndarray, np.ndarray]:
+    """(ids of `wanted` that are present, their row positions), given _sort_ids output"""
+    wanted = np.asarray(wanted, dtype=np.int64)
+    if not len(sorted_ids) or not len(wanted):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_ids, wanted), len(sorted_ids) - 1)
+    found = sorted_ids[positions] == wanted
+    return wanted[found], order[positions[found]]
+
+class EmbeddingIndex:
+    """Resident search index: a contiguous matrix of L2-normalized float32 rows plus their IDs.
+
+    Cosine similarity against every row is then one matrix-vector product,
+    and the top k come from argpartition rather than a full sort. Capacity
+    doubles on growth, so incremental adds are amortized O(1) per row.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._initial_capacity = initial_capacity
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._sorted: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def add(self, ids, vectors):
+        """Append rows; vectors is (n, dim) or a single (dim,) vector"""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        vectors = self._normalize(np.atleast_2d(vectors))
+        if not len(ids):
+            return
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vectors.shape[1]:
+                if self._size:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index")
+                self._matrix = np.empty((self._initial_capacity, vectors.shape[1]), dtype=np.float32)
+                self._ids = np.empty(self._initial_capacity, dtype=np.int64)
+            needed = self._size + len(ids)
+            if needed > len(self._ids):
+                capacity = max(needed, 2 * len(self._ids))
+                matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+                matrix[:self._size] = self._matrix[:self._size]
+                id_array = np.empty(capacity, dtype=np.int64)
+                id_array[:self._size] = self._ids[:self._size]
+                self._matrix, self._ids = matrix, id_array
+            self._matrix[self._size:needed] = vectors
+            self._ids[self._size:needed] = ids
+            self._size = needed
+            self._sorted = None
+
+    def clear(self):
+        # Fresh arrays on the next add, as on growth: searches still holding
+        # views of the old ones must not see their rows overwritten
+        with self._lock:
+            self._matrix = None
+            self._ids = np.empty(0, dtype=np.int64)
+            self._size = 0
+            self._sorted = None
+
+    def vectors(self, ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids found in the index, their normalized vectors), for scoring a few known rows"""
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = _sort_ids(self._ids[:self._size])
+            found, rows = _find_rows(*self._sorted, ids)
+            dim = self._matrix.shape[1] if self._matrix is not None else 0
+            return found, self._matrix[rows] if len(rows) else np.empty((0, dim), dtype=np.float32)
+
+    def rebuild(self, batches):
+        """Replace the contents with `batches` of (ids, vectors)"""
+        self.clear()
+        for ids, vectors in batches:
+            self.add(ids, vectors)
+
+    def search(self, query, top_k: int) -> List[Tuple[int, float]]:
+        """Return up to top_k (id, cosine similarity) pairs, best first"""
+        with self._lock:
+            size = self._size
+            if not size or top_k <= 0:
+                return []
+            # Views stay valid after the lock is released: growth and clear
+            # allocate new arrays, and appends only write past `size`
+            matrix, ids = self._matrix[:size], self._ids[:size]
+        scores = matrix @ self._normalize(query)
+        k = min(top_k, size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return list(zip(ids[best].tolist(), scores[best].tolist()))
+
+class MappedEmbeddingIndex:
+    """EmbeddingIndex stored in an append-only, memory-mapped sidecar file.
+
+    Every worker process maps the same file, so the operating system keeps
+    one shared page-cached copy of the matrix and opening it costs nothing.
+    Layout: a 64-byte header (magic, version, dimension, row count,
+    generation) followed by fixed-size records of (chunk id, normalized
+    float32 vector). Writers append under an exclusive lock on a separate
+    `.lock` file and publish new rows by bumping the row count last. Readers
+    re-check the header before each search and map newly appended rows
+    without reloading.
+
+    A file is never shrunk and its published rows are never rewritten, since
+    other threads and processes may be reading them through a mapping (a
+    shrunk mapping raises SIGBUS). Clearing or rebuilding writes a new file
+    and renames it over the old one; readers notice the new inode and remap,
+    while searches still running on the old mapping finish on intact pages.
+    """
+
+    MAGIC = b'EMBX'
+    VERSION = 2  # v1 held file ids; v2 holds chunk ids
+    HEADER = struct.Struct('<4sHHIQQ')  # magic, version, reserved, dim, rows, generation
+    HEADER_SIZE = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Writers lock this file rather than the data file, which gets replaced
+        self._lock_file = open(path + ".lock", 'ab')
+        self._file = None
+        self._map: Optional[np.ndarray] = None
+        self._mapped_rows = 0
+        self._generation: Optional[int] = None
+        self._sorted: Tuple[Optional[np.ndarray], tuple] = (None, ())  # (map, _sort_ids of its ids)
+        open(path, 'ab').close()
+        with self._locked():
+            if os.fstat(self._file.fileno()).st_size < self.HEADER_SIZE or not self._header_valid():
+                self._replace(0, 0, [])
+
+    def close(self):
+        self._map = None
+        if self._file:
+            self._file.close()
+        self._lock_file.close()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._open_current()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open_current(self) -> bool:
+        """Point self._file at the file now at self.path; True if that changed it"""
+        if self._file is not None and os.fstat(self._file.fileno()).st_ino == os.stat(self.path).st_ino:
+            return False
+        if self._file is not None:
+            self._file.close()
+        # Unbuffered, so header reads always see other processes' writes
+        self._file = open(self.path, 'r+b', buffering=0)
+        return True
+
+    def _read_header(self) -> Tuple[int, int, int]:
+        self._file.seek(0)
+        magic, version, _, dim, rows, generation = self.HEADER.unpack(self._file.read(self.HEADER.size))
+        return dim, rows, generation
+
+    def _header_valid(self) -> bool:
+        self._file.seek(0)
+        magic, version = self.HEADER.unpack(self._file.read(self.HEADER.size))[:2]
+        return magic == self.MAGIC and version == self.VERSION
+
+    def _write_header(self, dim: int, rows: int, generation: int):
+        self._file.seek(0)
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, dim, rows, generation))
+        self._file.flush()
+
+    def _replace(self, dim: int, generation: int, batches):
+        """Write `batches` of (ids, normalized vectors) to a new file and rename it over the sidecar"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                         prefix=os.path.basename(self.path) + ".")
+        rows = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(bytes(self.HEADER_SIZE))
+                for ids, vectors in batches:
+                    if dim and vectors.shape[1] != dim:
+                        raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match sidecar ({dim})")
+                    dim = vectors.shape[1]
+                    records = np.empty(len(ids), dtype=self._records(dim))
+                    records['id'] = ids
+                    records['vec'] = vectors
+                    f.write(records.tobytes())
+                    rows += len(ids)
+                f.seek(0)
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, dim, rows, generation))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._open_current()
+
+    def _records(self, dim: int) -> np.dtype:
+        return np.dtype([('id', '<i8'), ('vec', '<f4', (dim,))])
+
+    def refresh(self):
+        """Map rows appended by any process since the last call, or the replacement file"""
+        with self._lock:
+            replaced = self._open_current()
+            dim, rows, generation = self._read_header()
+            if replaced or generation != self._generation or rows < self._mapped_rows:
+                self._map, self._mapped_rows, self._generation = None, 0, generation
+            if rows > self._mapped_rows:
+                self._map = np.memmap(self._file, dtype=self._records(dim), mode='r',
+                                      offset=self.HEADER_SIZE, shape=(rows,))
+                self._mapped_rows = rows
+
+    def __len__(self) -> int:
+        self.refresh()
+        return self._mapped_rows
+
+    def ids(self) -> np.ndarray:
+        self.refresh()
+        return np.array(self._map['id']) if self._map is not None else np.empty(0, dtype=np.int64)
+
+    def add(self, ids, vectors):
+        """Append rows; vectors is (n, dim) or a single (dim,) vector"""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        vectors = EmbeddingIndex._normalize(np.atleast_2d(vectors))
+        if not len(ids):
+            return
+        with self._locked():
+            dim, rows, generation = self._read_header()
+            if rows and dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match sidecar ({dim})")
+            records = np.empty(len(ids), dtype=self._records(vectors.shape[1]))
+            records['id'] = ids
+            records['vec'] = vectors
+            # Overwrite anything past the published rows (e.g. a writer that died
+            # mid-append); nobody maps those bytes, so the file never shrinks under a reader
+            end = self.HEADER_SIZE + rows * records.itemsize
+            self._file.seek(end)
+            self._file.write(records.tobytes())
+            self._file.flush()
+            self._write_header(vectors.shape[1], rows + len(ids), generation)
+
+    def clear(self):
+        with self._locked():
+            dim, _, generation = self._read_header()
+            self._replace(dim, generation + 1, [])
+
+    def rebuild(self, batches):
+        """Replace the contents with `batches` of (ids, vectors), swapped in atomically"""
+        batches = ((np.atleast_1d(np.asarray(ids, dtype=np.int64)), EmbeddingIndex._normalize(np.atleast_2d(vectors)))
+                   for ids, vectors in batches)
+        with self._locked():
+            _, _, generation = self._read_header()
+            self._replace(0, generation + 1, batches)
+
+    def vectors(self, ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids found in the index, their normalized vectors), for scoring a few known rows"""
+        self.refresh()
+        records = self._map
+        if records is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        with self._lock:
+            mapped, sorted_ids = self._sorted
+            if mapped is not records:
+                sorted_ids = _sort_ids(np.asarray(records['id']))
+                self._sorted = (records, sorted_ids)
+        found, rows = _find_rows(*sorted_ids, ids)
+        return found, np.asarray(records['vec'][rows])
+
+    def search(self, query, top_k: int) -> List[Tuple[int, float]]:
+        """Return up to top_k (id, cosine similarity) pairs, best first"""
+        self.refresh()
+        # Published rows of a mapped file are immutable, so scoring needs no lock
+        records = self._map
+        if records is None or top_k <= 0:
+            return []
+        # Strided view of the vectors inside the records; BLAS reads it in place
+        scores = records['vec'] @ EmbeddingIndex._normalize(query)
+        k = min(top_k, len(records))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return list(zip(records['id'][best].tolist(), scores[best].tolist()))
+
+class QueryEmbeddingCache:
+    """Bounded LRU of normalized query text -> query embedding, with a TTL.
+
+    Guests repeat themselves and the agent retries searches within a session;
+    a hit skips the model entirely. Queries are normalized to lowercase with
+    collapsed whitespace, which the uncased MiniLM tokenizer does anyway, so
+    a cached vector is exactly what a fresh encode would return.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, vector: np.ndarray):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[self.normalize(query)] = (time.monotonic(), vector)
+            self._entries.move_to_end(self.normalize(query))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0
+            }
+
 class MeetingDatabase:
-    def __init__(self, db_path: str = "meeting.db"):
+    def __init__(self, db_path: str = "meeting.db", use_sidecar: bool = True,
+                 encoder: Optional[EmbeddingBatcher] = None, query_cache_size: int = 1024,
+                 query_cache_ttl: float = 600, batch_size: Optional[int] = None,
+                 batch_wait_ms: Optional[float] = None):
         self.db_path = db_path
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.connections = ConnectionManager(db_path)
+        # Concurrent add_file/vector_search calls share batched encodes
+        self.encoder = encoder or get_embedding_batcher(EMBEDDING_MODEL_NAME, batch_size, batch_wait_ms)
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl)
+        self._term_counts: Dict[str, int] = {}
+        self._term_counts_at = time.monotonic()
         self.init_database()
+        self._backfill_chunks()
+        # The sidecar is shared by every process using this database; an
+        # in-memory database has no file to put it next to
+        if use_sidecar and db_path != ":memory:":
+            self.index = MappedEmbeddingIndex(db_path + ".emb")
+            self._sync_index()
+        else:
+            self.index = EmbeddingIndex()
+            self._load_index()
+
+    @property
+    def embedding_model(self):
+        return get_embedding_model(EMBEDDING_MODEL_NAME)
+
+    def close(self):
+        if isinstance(self.index, MappedEmbeddingIndex):
+            self.index.close()
+        self.connections.close_all()
 
     def init_database(self):
         logger.info("Initializing meeting database")
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS meeting_files (
-                file_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                filename TEXT UNIQUE NOT NULL,
-                content TEXT NOT NULL,
-                embedding BLOB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        cursor.execute("SELECT COUNT(*) FROM meeting_files")
-        if cursor.fetchone()[0] == 0:
-            self._insert_sample_meetings(cursor)
-        conn.commit()
-        conn.close()
+        migrated = run_migrations(self.connections.connection(), MEETING_MIGRATIONS, "meeting database")
+        fresh = self.connections.connection().execute("SELECT COUNT(*) FROM meeting_files").fetchone()[0] == 0
+        if fresh:
+            self._insert_sample_meetings()
+        # Statistics taken from the sample rows would outlive them and steer the
+        # planner to table scans once real data arrives, so a new database has none
+        if migrated and not fresh:
+            self.analyze()
         logger.info("Meeting database initialization completed")
 
-    def _insert_sample_meetings(self, cursor):
+    def analyze(self):
+        analyze_database(self.connections.connection())
+
+    def _stored_embeddings(self, batch_size: int = 4096):
+        """Yield (chunk ids, vectors) batches of stored passage embeddings from the current model"""
+        cursor = self.connections.connection().execute("SELECT chunk_id, embedding FROM meeting_chunks ORDER BY chunk_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            ids, vectors = [], []
+            for chunk_id, blob in rows:
+                vector, model_id = decode_embedding(blob)
+                if model_id == EMBEDDING_MODEL_NAME:
+                    ids.append(chunk_id)
+                    vectors.append(vector)
+            if ids:
+                yield ids, np.stack(vectors)
+
+    def _load_index(self):
+        """Build the in-memory search index from the stored embeddings"""
+        self.index.rebuild(self._stored_embeddings())
+        logger.info(f"Loaded {len(self.index)} embeddings into the search index")
+
+    def _sync_index(self):
+        """Rebuild the sidecar if it does not hold exactly the rows in SQLite"""
+        stored = {row[0] for row in self.connections.connection().execute("SELECT chunk_id FROM meeting_chunks")}
+        if set(self.index.ids().tolist()) == stored:
+            logger.info(f"Embedding sidecar is current with {len(self.index)} rows")
+            return
+        logger.info("Embedding sidecar is out of date, rebuilding it from the database")
+        self.index.rebuild(self._stored_embeddings())
+        logger.info(f"Rebuilt embedding sidecar with {len(self.index)} rows")
+
+    def _insert_sample_meetings(self):
         logger.info("Inserting sample meeting transcripts")
         sample_meetings = [
             ("meeting_20250101.txt", "Discussed project timeline and deliverables."),
             ("meeting_20250215.txt", "Reviewed budget and resource allocation for Q2."),
             ("meeting_20250310.txt", "Analyzed customer feedback and upcoming product improvements."),
         ]
-        for filename, content in sample_meetings:
-            embedding = self.embedding_model.encode(content)
-            embedding_blob = pickle.dumps(embedding)
-            cursor.execute(
-                "INSERT INTO meeting_files (filename, content, embedding) VALUES (?, ?, ?)",
-                (filename, content, embedding_blob)
-            )
-        logger.info(f"Inserted {len(sample_meetings)} sample meeting transcripts")
+        # Encode before taking the write lock; other worker processes may be
+        # seeding the same database, so the table is checked again under it
+        embedded = [(filename, content, *self._embed_chunks(content)) for filename, content in sample_meetings]
+
+        def seed(conn) -> int:
+            if conn.execute("SELECT COUNT(*) FROM meeting_files").fetchone()[0]:
+                return 0
+            for filename, content, spans, vectors in embedded:
+                self._insert_file(conn, filename, content, spans, vectors)
+            return len(embedded)
 
+        inserted = self.connections.write(seed)
+        if inserted:
+            logger.info(f"Inserted {inserted} sample meeting transcripts")
+
+    def _stored_chunks(self, content_hash: str) -> Optional[Tuple[List[Tuple[int, int]], np.ndarray]]:
+        """Passages and embeddings of an already stored file with identical content"""
+        cursor = self.connections.connection().execute('''
+            SELECT c.start_offset, c.end_offset, c.embedding FROM meeting_chunks c
+            WHERE c.file_id = (SELECT file_id FROM meeting_files WHERE content_hash = ? LIMIT 1)
+            ORDER BY c.chunk_index
+        ''', (content_hash,))
+        spans, vectors = [], []
+        for start, end, blob in cursor.fetchall():
+            vector, model_id = decode_embedding(blob)
+            if model_id != EMBEDDING_MODEL_NAME:
+                return None
+            spans.append((start, end))
+            vectors.append(vector)
+        return (spans, np.stack(vectors)) if spans else None
+
+    def _embed_chunks(self, content: str) -> Tuple[List[Tuple[int, int]], np.ndarray]:
+        """Chunk content and encode every passage in one batch, reusing a stored copy's embeddings"""
+        stored = self._stored_chunks(_content_hash(content))
+        if stored:
+            return stored
+        spans = chunk_text(content) or [(0, len(content))]
+        return spans, self.encoder.encode_many([content[start:end] for start, end in spans])
+
+    def _insert_chunks(self, conn: sqlite3.Connection, file_id: int, spans, vectors) -> List[int]:
+        conn.executemany(
+            "INSERT INTO meeting_chunks (file_id, chunk_index, start_offset, end_offset, embedding) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(file_id, chunk_index, start, end, encode_embedding(vector))
+             for chunk_index, ((start, end), vector) in enumerate(zip(spans, vectors))]
+        )
+        cursor = conn.execute("SELECT chunk_id FROM meeting_chunks WHERE file_id = ? ORDER BY chunk_index", (file_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def _insert_file(self, conn: sqlite3.Connection, filename: str, content: str, spans, vectors,
+                     source_hash: Optional[str] = None) -> List[int]:
+        """Insert a file and its passages; returns the chunk ids"""
+        # The file-level embedding is the normalized mean of its passages
+        document = EmbeddingIndex._normalize(np.mean(vectors, axis=0))
+        cursor = conn.execute(
+            "INSERT INTO meeting_files (filename, content, embedding, source_hash, content_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (filename, content, encode_embedding(document), source_hash, _content_hash(content))
+        )
+        return self._insert_chunks(conn, cursor.lastrowid, spans, vectors)
+
+    def _backfill_chunks(self):
+        """Chunk and embed files stored before passages existed"""
+        rows = self.connections.connection().execute('''
+            SELECT file_id, content FROM meeting_files f
+            WHERE NOT EXISTS (SELECT 1 FROM meeting_chunks c WHERE c.file_id = f.file_id)
+        ''').fetchall()
+        chunked = 0
+        for file_id, content in rows:
+            spans, vectors = self._embed_chunks(content)
+
+            # Other processes opening the same database backfill at the same
+            # time; whoever takes the write lock first stores the file's chunks
+            def store(conn, file_id=file_id, spans=spans, vectors=vectors) -> bool:
+                pending = conn.execute('''
+                    SELECT 1 FROM meeting_files f WHERE f.file_id = ?
+                    AND NOT EXISTS (SELECT 1 FROM meeting_chunks c WHERE c.file_id = f.file_id)
+                ''', (file_id,)).fetchone()
+                if not pending:
+                    return False
+                self._insert_chunks(conn, file_id, spans, vectors)
+                return True
+
+            chunked += self.connections.write(store)
+        if chunked:
+            logger.info(f"Split {chunked} existing meeting files into passages")
+
+    @instrument("meeting.add_file")
     def add_file(self, filename: str, content: str) -> bool:
-        embedding = self.embedding_model.encode(content)
-        embedding_blob = pickle.dumps(embedding)
+        spans, vectors = self._embed_chunks(content)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "INSERT INTO meeting_files (filename, content, embedding) VALUES (?, ?, ?)",
-                    (filename, content, embedding_blob)
-                )
+            with self.connections.transaction() as conn:
+                chunk_ids = self._insert_file(conn, filename, content, spans, vectors)
+            self.index.add(chunk_ids, vectors)
             logger.info(f"Added file '{filename}' successfully.")
             return True
         except sqlite3.IntegrityError:
@@ -362,33 +2039,382 @@ class MeetingDatabase:
             return False
 
     def retrieve_file_content(self, filename: str) -> Optional[str]:
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.execute("SELECT content FROM meeting_files WHERE filename = ?", (filename,))
-            row = cur.fetchone()
-            return row[0] if row else None
+        """The whole transcript; prefer read_file/iter_file for anything shown or spoken"""
+        cur = self.connections.connection().execute("SELECT content FROM meeting_files WHERE filename = ?", (filename,))
+        row = cur.fetchone()
+        return row[0] if row else None
 
-    def vector_search(self, query: str, top_k: int = 5) -> List[Dict]:
-        query_emb = self.embedding_model.encode(query)
-        results = []
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT filename, content, embedding, created_at FROM meeting_files")
-            for filename, content, embedding_blob, created_at in cursor.fetchall():
-                embedding = pickle.loads(embedding_blob)
-                similarity = np.dot(query_emb, embedding) / (np.linalg.norm(query_emb) * np.linalg.norm(embedding))
+    @instrument("meeting.read_file")
+    def read_file(self, filename: str, offset: int = 0, length: int = READ_PAGE_CHARS) -> Optional[Dict]:
+        """One page of a transcript starting at character `offset`, or None if there is no such file.
+
+        Pages end on a word boundary where possible; "next_offset" is where
+        the following page starts, or None at the end of the file.
+        """
+        cur = self.connections.connection().execute(
+            "SELECT substr(content, ?, ?), length(content) FROM meeting_files WHERE filename = ?",
+            (max(0, offset) + 1, length, filename))
+        row = cur.fetchone()
+        if not row:
+            return None
+        text, total = row
+        offset = max(0, offset)
+        if offset + len(text) < total:
+            cut = max(text.rfind(' '), text.rfind('\n'))
+            if cut > length // 2:
+                text = text[:cut + 1]
+        next_offset = offset + len(text)
+        return {
+            "filename": filename,
+            "text": text,
+            "offset": offset,
+            "next_offset": next_offset if next_offset < total else None,
+            "total_length": total
+        }
+
+    def iter_file(self, filename: str, page_size: int = READ_PAGE_CHARS):
+        """Yield a transcript page by page without holding all of it"""
+        offset = 0
+        while offset is not None:
+            page = self.read_file(filename, offset, page_size)
+            if not page:
+                return
+            yield page['text']
+            offset = page['next_offset']
+
+    @instrument("meeting.encode_query")
+    def _encode_query(self, query: str) -> np.ndarray:
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.encoder.encode(QueryEmbeddingCache.normalize(query))
+            self.query_cache.put(query, vector)
+        return vector
+
+    def _passages(self, chunk_ids: List[int]) -> Dict[int, tuple]:
+        """chunk id -> (file_id, filename, passage, start, end, created_at); only the passage text is read"""
+        placeholders = ", ".join("?" * len(chunk_ids))
+        cursor = self.connections.connection().execute(f'''
+            SELECT c.chunk_id, c.file_id, f.filename,
+                   substr(f.content, c.start_offset + 1, c.end_offset - c.start_offset),
+                   c.start_offset, c.end_offset, f.created_at
+            FROM meeting_chunks c JOIN meeting_files f ON f.file_id = c.file_id
+            WHERE c.chunk_id IN ({placeholders})
+        ''', chunk_ids)
+        return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    @instrument("meeting.vector_search")
+    def vector_search(self, query: str, top_k: int = 5, passages_per_file: int = 1) -> List[Dict]:
+        """Best matching passages, at most passages_per_file from each file, best first.
+
+        Ranking touches only ids and embeddings; text is read for the final
+        hits alone. "content" holds the passage, "snippet" its most
+        query-relevant SNIPPET_CHARS, and start/end are offsets in the file.
+        """
+        if top_k <= 0:
+            return []
+        query_emb = self._encode_query(query)
+        fetch = top_k * max(1, passages_per_file) * 4
+        while True:
+            hits = self.index.search(query_emb, fetch)
+            rows = self._passages([chunk_id for chunk_id, _ in hits]) if hits else {}
+            results, per_file = [], {}
+            for chunk_id, similarity in hits:
+                # A chunk can appear twice if a rebuild raced with another process's append
+                if chunk_id not in rows:
+                    continue
+                file_id, filename, passage, start, end, created_at = rows.pop(chunk_id)
+                if per_file.get(file_id, 0) >= passages_per_file:
+                    continue
+                per_file[file_id] = per_file.get(file_id, 0) + 1
                 results.append({
                     "filename": filename,
-                    "content": content,
+                    "content": passage,
+                    "snippet": make_snippet(passage, query),
+                    "start": start,
+                    "end": end,
                     "similarity": similarity,
                     "created_at": created_at
                 })
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        return results[:top_k]
+                if len(results) == top_k:
+                    return results
+            # Few files dominated the nearest passages; look further down the ranking
+            if len(hits) < fetch:
+                return results
+            fetch *= 4
+
+    def _store_pdf_batch(self, batch: List[Tuple[str, str, str]]) -> Tuple[int, int]:
+        """Chunk, encode and insert (filename, text, source hash) triples in one transaction.
+
+        A changed PDF replaces the stored file of the same name if that file
+        came from PDF ingestion too (it has a source hash). A file of that
+        name added with add_file is kept, and the PDF is logged and left out.
+        Replaced chunks stay in the search index until the next start, and
+        vector_search skips them. Returns (files stored, chunks stored).
+        """
+        # Copies of stored or earlier documents in the batch reuse their embeddings;
+        # everything else is encoded together
+        hashes = [_content_hash(text) for _, text, _ in batch]
+        embedded, new = {}, {}
+        for (_, text, _), content_hash in zip(batch, hashes):
+            if content_hash in embedded or content_hash in new:
+                continue
+            stored = self._stored_chunks(content_hash)
+            if stored:
+                embedded[content_hash] = stored
+            else:
+                new[content_hash] = (text, chunk_text(text) or [(0, len(text))])
+        if new:
+            vectors = self.encoder.encode_many([text[start:end] for text, spans in new.values()
+                                                for start, end in spans])
+            offset = 0
+            for content_hash, (_, spans) in new.items():
+                embedded[content_hash] = (spans, vectors[offset:offset + len(spans)])
+                offset += len(spans)
+
+        chunk_ids, all_vectors, stored = [], [], 0
+        with self.connections.transaction(immediate=True) as conn:
+            for (filename, text, digest), content_hash in zip(batch, hashes):
+                existing = conn.execute("SELECT source_hash FROM meeting_files WHERE filename = ?",
+                                        (filename,)).fetchone()
+                if existing and existing[0] is None:
+                    logger.warning(f"Skipping PDF '{filename}': a meeting file of that name was added with add_file")
+                    continue
+                spans, file_vectors = embedded[content_hash]
+                # Its passages go with it (ON DELETE CASCADE)
+                conn.execute("DELETE FROM meeting_files WHERE filename = ?", (filename,))
+                chunk_ids += self._insert_file(conn, filename, text, spans, file_vectors, digest)
+                all_vectors.append(file_vectors)
+                stored += 1
+        if chunk_ids:
+            self.index.add(chunk_ids, np.concatenate(all_vectors))
+        return stored, len(chunk_ids)
+
+    @instrument("meeting.ingest_pdfs")
+    def ingest_pdfs(self, source: str, workers: Optional[int] = None, batch_files: int = 16,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Bulk-ingest every PDF in a directory (recursively) or matching a glob.
+
+        Text extraction runs in a pool of `workers` processes (default: one
+        per CPU; 0 or 1 extracts inline). Extracted files stream through
+        chunking, batched encoding and one transaction per `batch_files`
+        files, with at most 2 * workers extractions in flight, so memory stays
+        bounded however many files there are. Files whose stored SHA-256 is
+        unchanged are skipped, and a PDF named like a file added with add_file
+        fails rather than replacing it. `progress` is called with the running totals
+        after every batch; the final totals are returned.
+        """
+        sources = _pdf_sources(source)
+        known = dict(self.connections.connection().execute(
+            "SELECT filename, source_hash FROM meeting_files WHERE source_hash IS NOT NULL").fetchall())
+        stats = {'found': len(sources), 'skipped': 0, 'ingested': 0, 'failed': 0, 'chunks': 0,
+                 'elapsed_seconds': 0.0}
+        started = time.perf_counter()
+        todo = []
+        for path, filename in sources:
+            digest = _hash_file(path)
+            if known.get(filename) == digest:
+                stats['skipped'] += 1
+            else:
+                todo.append((path, filename, digest))
+        logger.info(f"Ingesting {len(todo)} of {len(sources)} PDFs from {source} ({stats['skipped']} unchanged)")
+
+        def report():
+            stats['elapsed_seconds'] = time.perf_counter() - started
+            done = stats['ingested'] + stats['failed']
+            logger.info(f"Ingested {done}/{len(todo)} PDFs, {stats['chunks']} passages "
+                        f"({done / stats['elapsed_seconds']:.1f} files/s)")
+            if progress:
+                progress(dict(stats))
+
+        def store(batch):
+            # A PDF left out for its name counts as failed
+            stored, chunks = self._store_pdf_batch(batch)
+            stats['ingested'] += stored
+            stats['failed'] += len(batch) - stored
+            stats['chunks'] += chunks
+
+        batch = []
+        for (path, filename, digest), (text, error) in self._extract_pdfs(todo, workers):
+            if error:
+                logger.warning(f"Skipping PDF '{path}': {error}")
+                stats['failed'] += 1
+                continue
+            batch.append((filename, text, digest))
+            if len(batch) >= batch_files:
+                store(batch)
+                batch = []
+                report()
+        if batch:
+            store(batch)
+        report()
+        # The planner statistics would still describe the table before the import
+        if stats['ingested']:
+            self.analyze()
+        return stats
+
+    @staticmethod
+    def _extract_pdfs(todo: List[Tuple[str, str, str]], workers: Optional[int]):
+        """Yield (item, (text, error)) as extractions finish, keeping a bounded number in flight"""
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if workers <= 1:
+            for item in todo:
+                yield item, _extract_pdf_text(item[0])
+            return
+        # Spawned rather than forked: the parent may hold model and batcher threads
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending, items = {}, iter(todo)
+            for item in items:
+                pending[pool.submit(_extract_pdf_text, item[0])] = item
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            for future in list(pending):
+                yield pending.pop(future), future.result()
+
+    def _document_frequencies(self, terms: List[str]) -> Dict[str, int]:
+        """How many files contain each term, from meeting_fts_vocab.
+
+        FTS5 stems the terms itself: they are written to a private temp FTS5
+        table with the same tokenizer, whose vocabulary is joined to
+        meeting_fts_vocab in one query. Counting a common term walks its whole
+        posting list, so counts are cached for TERM_COUNTS_TTL seconds; they
+        only decide which terms are too common to search on.
+        """
+        if time.monotonic() - self._term_counts_at > TERM_COUNTS_TTL or len(self._term_counts) > 10000:
+            self._term_counts, self._term_counts_at = {}, time.monotonic()
+        missing = [term for term in terms if term not in self._term_counts]
+        if missing:
+            conn = self.connections.connection()
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.query_fts USING fts5(term, tokenize='porter unicode61')")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.query_fts_terms USING fts5vocab(temp, query_fts, 'instance')")
+            conn.executemany("INSERT INTO temp.query_fts (rowid, term) VALUES (?, ?)", list(enumerate(missing)))
+            try:
+                rows = conn.execute('''
+                    SELECT q.doc, COALESCE(v.doc, 0) FROM temp.query_fts_terms q
+                    LEFT JOIN meeting_fts_vocab v ON v.term = q.term
+                ''').fetchall()
+            finally:
+                conn.execute("DELETE FROM temp.query_fts")
+            counts = {}
+            # A term the tokenizer splits (e.g. "q2_budget") is a phrase: no commoner than its rarest part
+            for i, count in rows:
+                counts[i] = min(counts.get(i, count), count)
+            for i, term in enumerate(missing):
+                self._term_counts[term] = counts.get(i, 0)
+        return {term: self._term_counts[term] for term in terms}
+
+    def _lexical_candidates(self, query: str, limit: int) -> List[int]:
+        """File ids matching any distinctive query term, best BM25 first"""
+        terms = dict.fromkeys(term for term in re.findall(r'\w+', query.lower()) if term not in STOPWORDS)
+        if not terms:
+            return []
+        conn = self.connections.connection()
+        files = conn.execute("SELECT COUNT(*) FROM meeting_files").fetchone()[0]
+        common = max(limit, int(files * COMMON_TERM_FRACTION))
+        terms = [term for term, count in self._document_frequencies(list(terms)).items() if count <= common]
+        if not terms:
+            return []
+        # Each term quoted, so FTS5 syntax in the query (AND, NEAR, *) is just text
+        match = " OR ".join(f'"{term}"' for term in terms)
+        cursor = conn.execute(
+            "SELECT rowid FROM meeting_fts WHERE meeting_fts MATCH ? ORDER BY rank LIMIT ?", (match, limit))
+        return [row[0] for row in cursor.fetchall()]
 
+    def _score_files(self, query_emb, file_ids: List[int]) -> Dict[int, Tuple[int, float]]:
+        """file id -> (best chunk id, cosine similarity), scoring these files' passages from the index"""
+        if not file_ids:
+            return {}
+        placeholders = ", ".join("?" * len(file_ids))
+        cursor = self.connections.connection().execute(
+            f"SELECT chunk_id, file_id FROM meeting_chunks WHERE file_id IN ({placeholders})", file_ids)
+        files = dict(cursor.fetchall())
+        chunk_ids, vectors = self.index.vectors(list(files))
+        if not len(chunk_ids):
+            return {}
+        scores = vectors @ EmbeddingIndex._normalize(query_emb)
+        best = {}
+        for chunk_id, score in zip(chunk_ids.tolist(), scores.tolist()):
+            file_id = files[chunk_id]
+            if file_id not in best or score > best[file_id][1]:
+                best[file_id] = (chunk_id, score)
+        return best
+
+    def _nearest_chunks(self, query_emb, top_k: int) -> List[Tuple[int, int, float]]:
+        """(chunk id, file id, similarity) for the top_k passages over the whole index"""
+        hits = self.index.search(query_emb, top_k)
+        if not hits:
+            return []
+        placeholders = ", ".join("?" * len(hits))
+        cursor = self.connections.connection().execute(
+            f"SELECT chunk_id, file_id FROM meeting_chunks WHERE chunk_id IN ({placeholders})",
+            [chunk_id for chunk_id, _ in hits])
+        files = dict(cursor.fetchall())
+        return [(chunk_id, files[chunk_id], score) for chunk_id, score in hits if chunk_id in files]
+
+    @instrument("meeting.hybrid_search")
+    def hybrid_search(self, query: str, top_k: int = 5, candidates: int = HYBRID_CANDIDATES) -> List[Dict]:
+        """Keyword + semantic search, returning the best passage per file like vector_search.
+
+        The keyword ranking is the top `candidates` BM25 matches from
+        meeting_fts, with stopwords and very common terms left out. Those
+        files are the prefilter: only their passages are scored against the
+        query embedding, which gives the dense ranking. When the keywords
+        find fewer than HYBRID_MIN_LEXICAL files per requested result (or no
+        distinctive term at all), the dense ranking comes from the
+        `candidates` nearest passages in the whole index instead. The two
+        rankings are merged with reciprocal rank fusion, and each result
+        also carries its fused "score".
+        """
+        if top_k <= 0:
+            return []
+        candidates = max(candidates, top_k)
+        query_emb = self._encode_query(query)
+        lexical = self._lexical_candidates(query, candidates)
+        if len(lexical) >= HYBRID_MIN_LEXICAL * top_k:
+            best = self._score_files(query_emb, lexical)
+        else:
+            best = {}
+            for chunk_id, file_id, score in self._nearest_chunks(query_emb, candidates):
+                if file_id not in best or score > best[file_id][1]:
+                    best[file_id] = (chunk_id, score)
+        dense_rank = {file_id: rank for rank, file_id in
+                      enumerate(sorted(best, key=lambda file_id: -best[file_id][1]), 1)}
+        best.update(self._score_files(query_emb, [file_id for file_id in lexical if file_id not in best]))
+        lexical_rank = {file_id: rank for rank, file_id in enumerate(lexical, 1)}
+
+        fused = {file_id: (1 / (RRF_K + dense_rank[file_id]) if file_id in dense_rank else 0) +
+                 (1 / (RRF_K + lexical_rank[file_id]) if file_id in lexical_rank else 0)
+                 for file_id in best}
+        top = sorted(fused, key=lambda file_id: -fused[file_id])[:top_k]
+        if not top:
+            return []
+
+        rows = self._passages([best[file_id][0] for file_id in top])
+        results = []
+        for file_id in top:
+            chunk_id, similarity = best[file_id]
+            if chunk_id not in rows:
+                continue
+            _, filename, passage, start, end, created_at = rows[chunk_id]
+            results.append({
+                "filename": filename,
+                "content": passage,
+                "snippet": make_snippet(passage, query),
+                "start": start,
+                "end": end,
+                "similarity": similarity,
+                "score": fused[file_id],
+                "created_at": created_at
+            })
+        return results
+
+    @instrument("meeting.truncate_files")
     def truncate_files(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connections.transaction() as conn:
                 conn.execute("DELETE FROM meeting_files")
-                conn.commit()
+            self.index.clear()
             logger.info("All meeting files truncated successfully.")
         except Exception as e:
             logger.error(f"Error truncating meeting files: {e}")
@@ -409,3 +2435,152 @@ class MeetingDatabase:
         except Exception as e:
             logger.error(f"Error extracting text from PDF '{pdf_path}': {e}")
             return False
+
+
+class MeetingBusyError(RuntimeError):
+    """Raised when the meeting worker pool cannot take another request"""
+
+class AsyncMeetingDatabase:
+    """Awaitable facade over MeetingDatabase for use from the agent's event loop.
+
+    Searches and writes run on a small dedicated thread pool with a per-call
+    timeout. A call that times out or is cancelled is dropped if it has not
+    started yet. Once max_pending calls are outstanding (including ones whose
+    caller gave up but which are still running), new calls fail fast with
+    MeetingBusyError instead of queueing. PDF ingestion runs as background
+    jobs on a separate pool, so parsing never delays a search; callers get a
+    job id to poll, or to cancel while the job is still queued. Bulk imports
+    belong to `python -m dbdriver ingest`: its extraction processes must not
+    be spawned from the agent process.
+    """
+
+    JOB_HISTORY = 100
+
+    def __init__(self, db: MeetingDatabase, max_workers: int = 2, max_pending: int = 8,
+                 timeout_seconds: float = 10.0, ingest_workers: int = 1, max_jobs: int = 16):
+        self.db = db
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="meeting-db")
+        self.ingest_executor = ThreadPoolExecutor(max_workers=ingest_workers, thread_name_prefix="meeting-ingest")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._jobs: "OrderedDict[int, Dict]" = OrderedDict()
+        self._job_futures: Dict[int, Future] = {}
+        self._next_job_id = 1
+
+    def _release(self, _):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, func, *args, timeout: Optional[float] = None):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise MeetingBusyError(f"{self._pending} meeting requests are already in progress")
+            self._pending += 1
+        future = self.executor.submit(func, *args)
+        # Released when the work really ends, not when the caller stops waiting
+        future.add_done_callback(self._release)
+        # Cancelling the wrapper (timeout or task cancellation) cancels the
+        # executor future too, so queued work never starts
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout_seconds)
+
+    async def vector_search(self, query: str, top_k: int = 5) -> List[Dict]:
+        return await self._run(self.db.vector_search, query, top_k)
+
+    async def hybrid_search(self, query: str, top_k: int = 5) -> List[Dict]:
+        return await self._run(self.db.hybrid_search, query, top_k)
+
+    async def add_file(self, filename: str, content: str) -> bool:
+        return await self._run(self.db.add_file, filename, content)
+
+    async def read_file(self, filename: str, offset: int = 0, length: int = READ_PAGE_CHARS) -> Optional[Dict]:
+        return await self._run(self.db.read_file, filename, offset, length)
+
+    async def truncate_files(self):
+        return await self._run(self.db.truncate_files)
+
+    def _submit_job(self, kind: str, target: str, func: Callable[[Dict], object]) -> int:
+        with self._lock:
+            active = sum(job['state'] in ('queued', 'running') for job in self._jobs.values())
+            if active >= self.max_jobs:
+                raise MeetingBusyError(f"{active} ingestion jobs are already queued or running")
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'kind': kind,
+                'target': target,
+                'state': 'queued',
+                'result': None,
+                'error': None,
+                'submitted_at': datetime.now().isoformat(timespec='seconds'),
+                'finished_at': None
+            }
+            # Forget the oldest finished jobs
+            finished = [i for i, job in self._jobs.items() if job['finished_at']]
+            for old_id in finished[:max(0, len(self._jobs) - self.JOB_HISTORY)]:
+                del self._jobs[old_id]
+                self._job_futures.pop(old_id, None)
+            self._job_futures[job_id] = self.ingest_executor.submit(self._run_job, self._jobs[job_id], func)
+        return job_id
+
+    def _run_job(self, job: Dict, func: Callable[[Dict], object]):
+        with self._lock:
+            job['state'] = 'running'
+        result, error = None, None
+        try:
+            result = func(job)
+        except Exception as e:
+            logger.error(f"Meeting job {job['job_id']} ({job['kind']} {job['target']}) failed: {e}")
+            error = str(e)
+        with self._lock:
+            job['result'], job['error'] = result, error
+            job['state'] = 'failed' if error is not None or result is False else 'done'
+            job['finished_at'] = datetime.now().isoformat(timespec='seconds')
+
+    def ingest_pdf(self, pdf_path: str) -> int:
+        """Start ingesting one PDF in the background and return its job id"""
+        return self._submit_job('ingest_pdf', pdf_path, lambda job: self.db.ingest_pdf_file(pdf_path))
+
+    def job_status(self, job_id: int) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel_job(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet; False if it is unknown, running or finished"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] != 'queued' or not self._job_futures[job_id].cancel():
+                return False
+            job['state'] = 'cancelled'
+            job['finished_at'] = datetime.now().isoformat(timespec='seconds')
+            return True
+
+    def shutdown(self, wait: bool = True):
+        """Drop queued jobs, stop the worker threads and close their connections"""
+        self.ingest_executor.shutdown(wait=wait, cancel_futures=True)
+        self.executor.shutdown(wait=wait)
+        self.db.close()
+
+
+def ingest_directory_cli(source: str, workers: int = None):
+    """Bulk-ingest a directory or glob of PDFs: python -m dbdriver ingest <dir|glob> [workers]"""
+    print(f"Ingesting PDFs from: {source}")
+    stats = MeetingDatabase().ingest_pdfs(source, workers)
+    print(
+        f"{stats['ingested']} ingested, {stats['skipped']} unchanged, {stats['failed']} failed "
+        f"({stats['chunks']} passages in {stats['elapsed_seconds']:.1f}s)"
+    )
+
+# Lives here rather than in agent.py: extraction workers are spawned and
+# re-import the main module, which must not pull in LiveKit or the hotel tools
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == "ingest":
+        ingest_directory_cli(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    else:
+        print("Usage: python -m dbdriver ingest <dir|glob> [workers]")
+        sys.exit(2)
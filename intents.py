@@ -0,0 +1,132 @@
+"""Single-pass intent routing for the meeting-file commands in voice transcripts.
+
+One regex scan over the lowered transcript steps over ordinary words and
+stops at command verbs, object words, query markers and arguments. An
+argument keyword comes out together with its value (filename:x, file:x.pdf,
+offset:N, job N) in a named group, and the value is cut from the original
+text at the same position, so it keeps its case and is never mistaken for a
+command word. Text after content: is taken as it is, up to a following
+filename:. A fixed table of rules is then checked against the positions.
+"""
+import re
+from typing import Dict, NamedTuple, Optional
+
+_KEYWORDS: Dict[str, str] = {
+    **dict.fromkeys(('add ingest search find lookup show get retrieve read delete remove truncate clear '
+                     'cancel stop status progress check').split(), 'verb'),
+    **dict.fromkeys('meeting meetings transcript transcripts notes database pdf'.split(), 'object'),
+    **dict.fromkeys(('about', 'for', 'on', ':'), 'marker'),
+}
+_ARGUMENT_WORDS = ('filename', 'content', 'path', 'file', 'offset', 'job')
+
+# Each match skips the ordinary words before the next keyword, argument or ":"
+_TOKEN_RE = re.compile(
+    r'(?:[^\w:]+|(?!(?:%s)\b)\w+\b)*' % '|'.join([word for word in _KEYWORDS if word != ':'] + list(_ARGUMENT_WORDS)) +
+    r'(?:filename\s*[:=]\s*(?P<filename>\S+)|(?P<content>content)\s*[:=]\s*'
+    r'|(?:path|file)\s*:\s*(?P<path>\S+\.pdf)|offset\s*[:=]\s*(?P<offset>\d+)'
+    r'|job\s*[:#=]?\s*(?P<job_id>\d+)|(?P<meeting_file>meeting\s+files?)\b|(?P<word>\w+)|:)')
+
+
+class Intent(NamedTuple):
+    name: str
+    args: Dict[str, object]
+
+
+# (intent, verbs, objects): the intent applies when one of the verbs comes
+# before one of the objects. Checked in order; the first match wins.
+_RULES = [
+    ('ingest_pdf', {'add', 'ingest'}, {'pdf'}),
+    ('add_file', {'add'}, {'meeting file'}),
+    ('retrieve', {'get', 'show', 'retrieve', 'read'}, {'meeting file', 'meeting files', 'meeting', 'meetings',
+                                                      'transcript', 'transcripts'}),
+    ('search', {'search', 'find', 'lookup', 'show'}, {'meeting file', 'meeting files', 'meeting', 'meetings',
+                                                      'transcript', 'transcripts', 'notes'}),
+    ('delete_all', {'delete', 'remove', 'truncate', 'clear'}, {'meeting files', 'meetings', 'transcripts', 'database'}),
+]
+
+
+def _before(verbs: Dict[str, int], objects: Dict[str, int], verb_set, object_set) -> bool:
+    first = None
+    for verb, at in verbs.items():
+        if verb in verb_set and (first is None or at < first):
+            first = at
+    if first is None:
+        return False
+    for obj, at in objects.items():
+        if obj in object_set and at > first:
+            return True
+    return False
+
+
+def route(message: str) -> Optional[Intent]:
+    """Classify a transcript and extract its arguments, or None if it is not a meeting command"""
+    lowered = message.lower()
+    if len(lowered) != len(message):
+        # A few letters (e.g. "İ") lower to two characters; keep positions in line with the original
+        lowered = ''.join(c if len(c.lower()) != 1 else c.lower() for c in message)
+    verbs: Dict[str, int] = {}
+    objects: Dict[str, int] = {}
+    args: Dict[str, object] = {}
+    query_at = None
+    content_at = None
+    for match in _TOKEN_RE.finditer(lowered):
+        name = match.lastgroup
+        if name == 'word':
+            # Inside a content: value every word is just text
+            if content_at is not None:
+                continue
+            token = match[name]
+            kind = _KEYWORDS.get(token)
+            if kind == 'verb':
+                verbs.setdefault(token, match.start(name))
+            elif kind == 'object':
+                objects[token] = match.start(name)
+            elif kind == 'marker' and query_at is None:
+                query_at = match.end()
+        elif name == 'filename':
+            # The one argument that ends a content: value
+            if content_at is not None:
+                end = lowered.rindex('filename', content_at, match.start(name))
+                args.setdefault('content', message[content_at:end].rstrip())
+                content_at = None
+            args.setdefault(name, message[match.start(name):match.end()])
+        elif content_at is not None:
+            continue
+        elif name is None:
+            if query_at is None:
+                query_at = match.end()
+        elif name == 'meeting_file':
+            objects['meeting ' + match[name].split()[-1]] = match.start(name)
+        elif name == 'content':
+            if 'content' not in args:
+                content_at = match.end()
+        elif name == 'path':
+            objects['pdf'] = match.start(name)
+            args.setdefault(name, message[match.start(name):match.end()])
+        else:
+            args.setdefault(name, int(match[name]))
+    if content_at is not None and content_at < len(message):
+        args['content'] = message[content_at:].rstrip()
+
+    # Every intent needs a verb; booking chatter stops here
+    if not verbs:
+        return None
+    if 'job_id' in args:
+        if 'cancel' in verbs or 'stop' in verbs:
+            return Intent('cancel_job', args)
+        if verbs.keys() & {'status', 'progress', 'check'}:
+            return Intent('job_status', args)
+    # A pdf given as filename:x.pdf counts as the path to ingest
+    if 'path' not in args and str(args.get('filename', '')).lower().endswith('.pdf'):
+        args['path'] = args['filename']
+    for name, verb_set, object_set in _RULES:
+        if not _before(verbs, objects, verb_set, object_set):
+            continue
+        # "show" fits both: it retrieves when a filename is given, otherwise it searches
+        if name == 'retrieve' and 'filename' not in args and verbs.keys() & {'search', 'find', 'lookup', 'show'}:
+            continue
+        if name == 'search':
+            # The query is everything after the first about/for/on/":" outside an argument
+            args['query'] = message if query_at is None else lowered[query_at:].strip()
+        return Intent(name, args)
+    return None
@@ -0,0 +1,278 @@
+"""Lightweight latency, error and counter metrics for tools and database operations.
+
+Wrap a function with @instrument("tool.book_room") (sync or async), or a
+block with `with timer("hotel.export")`, and every call lands in a
+fixed-bucket histogram: a couple of perf_counter calls, a bisect and a lock,
+cheap enough to leave on in production. Read the numbers with
+REGISTRY.snapshot() (p50/p95/p99, error rate), serve them in Prometheus text
+format with serve_metrics(port), or log them periodically with
+start_log_dump(interval). start_from_env() does either based on METRICS_PORT
+and METRICS_LOG_INTERVAL.
+"""
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, 50us to ~90s in steps of 1.5x
+BUCKETS: List[float] = [0.00005 * 1.5 ** i for i in range(36)]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum, errors and quantile estimates"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+
+    def observe(self, operation: str, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = Histogram()
+            histogram.observe(seconds, error)
+
+    def increment(self, counter: str, amount: float = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def add_collector(self, name: str, collect: Callable[[], Dict]):
+        """Export the numeric values of collect() (e.g. a stats() method) as gauges under `name`"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def _gauges(self) -> Dict[str, Dict[str, float]]:
+        gauges = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector '{name}' failed: {e}")
+                continue
+            gauges[name] = {key: float(value) for key, value in values.items()
+                            if isinstance(value, (int, float)) and not isinstance(value, str)}
+        return gauges
+
+    def snapshot(self) -> Dict:
+        """Per-operation calls, errors, error rate and latency quantiles in milliseconds"""
+        with self._lock:
+            operations = {
+                name: {
+                    'calls': h.count,
+                    'errors': h.errors,
+                    'error_rate': h.errors / h.count if h.count else 0,
+                    'mean_ms': h.total / h.count * 1000 if h.count else 0,
+                    'p50_ms': h.quantile(0.5) * 1000,
+                    'p95_ms': h.quantile(0.95) * 1000,
+                    'p99_ms': h.quantile(0.99) * 1000,
+                    'max_ms': h.max * 1000,
+                }
+                for name, h in sorted(self._histograms.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {'operations': operations, 'counters': counters, 'gauges': self._gauges()}
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP fyp_operation_duration_seconds Latency of instrumented tools and database operations.",
+            "# TYPE fyp_operation_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            for name, h in histograms:
+                label = f'operation="{_escape(name)}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'fyp_operation_duration_seconds_bucket{{{label},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'fyp_operation_duration_seconds_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f'fyp_operation_duration_seconds_sum{{{label}}} {h.total:.9g}')
+                lines.append(f'fyp_operation_duration_seconds_count{{{label}}} {h.count}')
+            lines += ["# HELP fyp_operation_errors_total Instrumented calls that raised.",
+                      "# TYPE fyp_operation_errors_total counter"]
+            lines += [f'fyp_operation_errors_total{{operation="{_escape(name)}"}} {h.errors}' for name, h in histograms]
+            lines += ["# HELP fyp_operation_latency_seconds Latency quantiles estimated from the histogram.",
+                      "# TYPE fyp_operation_latency_seconds gauge"]
+            for name, h in histograms:
+                for q in (0.5, 0.95, 0.99):
+                    lines.append(f'fyp_operation_latency_seconds{{operation="{_escape(name)}",quantile="{q}"}} '
+                                 f'{h.quantile(q):.9g}')
+            counters = sorted(self._counters.items())
+        for name, value in counters:
+            metric = f"fyp_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:.9g}"]
+        for collector, values in sorted(self._gauges().items()):
+            for key, value in sorted(values.items()):
+                metric = f"fyp_{_metric_name(collector)}_{_metric_name(key)}"
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value:.9g}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric_name(value: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', value)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def instrument(operation: Optional[str] = None, registry: Optional[MetricsRegistry] = None):
+    """Decorator recording latency and raised exceptions of every call.
+
+    Works for plain and async functions and keeps the wrapped signature and
+    docstring, so it can sit directly under @function_tool().
+    """
+    def decorate(func):
+        name = operation or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                error = False
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    (registry or REGISTRY).observe(name, time.perf_counter() - started, error)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                error = False
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    (registry or REGISTRY).observe(name, time.perf_counter() - started, error)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def timer(operation: str, registry: Optional[MetricsRegistry] = None):
+    """Record the latency of a block, counting an exception as an error"""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        (registry or REGISTRY).observe(operation, time.perf_counter() - started, error)
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start_log_dump(interval_seconds: float, registry: Optional[MetricsRegistry] = None) -> threading.Event:
+    """Log a JSON snapshot every interval from a daemon thread; set the returned event to stop"""
+    registry = registry or REGISTRY
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_seconds):
+            logger.info(f"metrics pid={os.getpid()} {json.dumps(registry.snapshot())}")
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
+
+
+def start_from_env():
+    """Start the endpoint and/or log dump if METRICS_PORT / METRICS_LOG_INTERVAL are set.
+
+    Each worker process has its own registry. Only the first process to bind
+    METRICS_PORT serves it; the others should rely on the log dump.
+    """
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            serve_metrics(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+        except OSError as e:
+            logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+    interval = os.getenv("METRICS_LOG_INTERVAL")
+    if interval:
+        start_log_dump(float(interval))
@@ -87,7 +87,7 @@ Each room type offers different amenities and price ranges. Would you like me to
 OCCASION_DISCOUNT_PROMPT = """
 That's wonderful! A {occasion} is definitely a special occasion worth celebrating.
 
-For {occasion} bookings, we offer a special discount of {discount_percentage}% off our regular rates. This means you can enjoy our {room_type} at a reduced price of ${final_price:.2f} per night instead of the regular ${original_price:.2f}.
+For {occasion} bookings, we offer a special discount of {discount_percentage}% off our regular rates. This means you can enjoy our {room_type} at a reduced price of ${nightly_price:.2f} per night instead of the regular ${original_price:.2f}.
 
 Would you like to proceed with this special rate for your {occasion}?
 """
@@ -102,7 +102,7 @@ Booking Summary:
 - Check-in: {check_in_date}
 - Check-out: {check_out_date}
 - Special Occasion: {special_occasion}
-- Total Price: ${final_price:.2f}
+- Total Price: ${total_price:.2f}
 - Discount Applied: ${discount_amount:.2f}
 
 Your reservation has been confirmed! You'll receive a confirmation email shortly.